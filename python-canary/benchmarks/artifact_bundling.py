@@ -0,0 +1,110 @@
+"""
+Request count and wall time of uploading a run's artifacts one object per file and as one bundle.
+
+The artifacts of a typical run, 25 screenshots, the log, the report and the HAR file, are uploaded by
+BaseSyntheticsUploader.upload_artifacts_async to a local S3 served by moto, alternating between per-file upload
+and artifact bundling. Each S3 request can be delayed to model the round trip to S3 from Lambda.
+
+Needs boto3 and moto with its server extra, which are not part of the runtime layer:
+
+    pip install boto3 "moto[server]"
+    python artifact_bundling.py [runs] [latency in ms per request]
+"""
+
+import asyncio
+import collections
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+S3_BUCKET = "synthetics-benchmark-artifacts"
+SCREENSHOT_COUNT = 25
+SCREENSHOT_SIZE = 60000
+
+
+def make_artifacts(path):
+    os.makedirs(path)
+    for index in range(SCREENSHOT_COUNT):
+        with open(os.path.join(path, "%02d-step-succeeded.png" % index), "wb") as file:
+            file.write(os.urandom(SCREENSHOT_SIZE))
+    with open(os.path.join(path, "2024-01-01T00-00-00-000Z-log.txt"), "w") as file:
+        file.write("INFO: Step succeeded\n" * 10000)
+    with open(os.path.join(path, "SyntheticsReport-PASSED.json"), "w") as file:
+        file.write('{"stepName": "step", "status": "PASSED"}' * 2000)
+    with open(os.path.join(path, "results.har.html"), "w") as file:
+        file.write("<html>" + '{"request": {"url": "https://example.com/"}}' * 10000 + "</html>")
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    latency = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0
+
+    from moto.server import ThreadedMotoServer
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = ThreadedMotoServer(port=0, verbose=False)
+    server.start()
+    host, port = server.get_host_and_port()
+    # read by the runtime constants and by boto3 when the clients are created
+    os.environ.update(AWS_ACCESS_KEY_ID="benchmark", AWS_SECRET_ACCESS_KEY="benchmark", AWS_REGION="us-east-1",
+                      AWS_ENDPOINT_URL="http://%s:%s" % (host, port))
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "lambda-layers",
+                                    "Synthetics_Selenium-32-d7dd6d0228", "python"))
+
+    import boto3
+    from aws_synthetics.common import synthetics_configuration
+    from aws_synthetics.core.base_synthetics_uploader import BaseSyntheticsUploader
+    from aws_synthetics.core.s3_bucket_cache import s3_bucket_cache
+
+    requests = collections.Counter()
+
+    def count_request(model, **kwargs):
+        requests[model.name] += 1
+
+    def delay_request(**kwargs):
+        time.sleep(latency)
+
+    # registered on the default session, so the clients the uploader creates inherit them
+    session = boto3._get_default_session()
+    session.events.register("before-call.s3", count_request)
+    if latency:
+        session.events.register("before-send.s3", delay_request)
+    boto3.client("s3").create_bucket(Bucket=S3_BUCKET)
+
+    class Uploader(BaseSyntheticsUploader):
+        pass
+
+    work_dir = tempfile.mkdtemp()
+    results = collections.defaultdict(list)
+    try:
+        for run in range(runs):
+            for bundling in (False, True):
+                artifacts_path = os.path.join(work_dir, "run-%s-%s" % (run, bundling))
+                make_artifacts(artifacts_path)
+                synthetics_configuration.with_artifact_bundling(bundling)
+                # every run sets up its client, as a cold invocation does
+                s3_bucket_cache.clear()
+                uploader = Uploader(artifacts_path)
+                uploader.set_canary_details("benchmark", {"bucket": S3_BUCKET, "key": "run-%s-%s" % (run, bundling)},
+                                            None)
+                requests.clear()
+                start = time.perf_counter()
+                errors = asyncio.run(uploader.upload_artifacts_async(artifacts_path))
+                elapsed = time.perf_counter() - start
+                if errors:
+                    raise RuntimeError("Upload failed: %s" % errors)
+                results[bundling].append((elapsed, dict(requests)))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        server.stop()
+
+    print("%s artifacts, %s runs, %.0f ms latency per request" % (SCREENSHOT_COUNT + 3, runs, latency * 1000))
+    for bundling, name in ((False, "per-file"), (True, "bundled")):
+        times = [elapsed * 1000 for elapsed, _ in results[bundling]]
+        print("%-9s %s, %.0f-%.0f ms" % (name, results[bundling][-1][1], min(times), max(times)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Cold-start extraction of the chromium libraries, streamed to disk on parallel threads by prepare_chromium_library
+compared with decompressing each archive into memory and extracting it from there, one after another.
+
+Each run extracts into an empty directory in a new process, so the wall time and the peak RSS are those of a
+cold start. The extracted trees of both modes are compared. The layer in this repository only contains
+aws.tar.br and swiftshader.tar.br, a synthetic chromium.br and fonts.tar.br are generated next to them unless
+a directory with the real archives is given.
+
+Needs brotli, the layer vendors it for the Lambda Python version only:
+
+    pip install brotli
+    python chromium_extraction.py [runs] [directory with the compressed libraries]
+"""
+
+import hashlib
+import io
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+
+LAYER_PYTHON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "lambda-layers",
+                                 "Synthetics_Selenium-32-d7dd6d0228", "python")
+LIBRARIES = ["chromium.br", "aws.tar.br", "swiftshader.tar.br", "fonts.tar.br"]
+MODES = ["in-memory", "streaming"]
+SYNTHETIC_CHROMIUM_SIZE = 120 * 1024 * 1024
+SYNTHETIC_FONT_COUNT = 40
+
+
+def make_synthetic_libraries(source_dir):
+    """
+        Copy the archives of the layer and add a chromium binary and fonts that compress like the real ones
+    """
+    import brotli
+    rnd = random.Random(1)
+    layer_libraries = os.path.join(LAYER_PYTHON_PATH, "lib", "chromium")
+    for name in ("aws.tar.br", "swiftshader.tar.br"):
+        shutil.copy(os.path.join(layer_libraries, name), source_dir)
+    block_count = SYNTHETIC_CHROMIUM_SIZE // 16384
+    # a quarter of each block is random, the binary compresses to about a quarter of its size as well
+    chromium = b"".join(rnd.getrandbits(4096 * 8).to_bytes(4096, "little") + bytes(12288) for _ in range(block_count))
+    with open(os.path.join(source_dir, "chromium.br"), "wb") as f:
+        f.write(brotli.compress(chromium, quality=5))
+    fonts = io.BytesIO()
+    with tarfile.open(fileobj=fonts, mode="w") as tf:
+        for index in range(SYNTHETIC_FONT_COUNT):
+            data = rnd.getrandbits(100000 * 8).to_bytes(100000, "little") + bytes(200000)
+            info = tarfile.TarInfo("font%02d.ttf" % index)
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+    with open(os.path.join(source_dir, "fonts.tar.br"), "wb") as f:
+        f.write(brotli.compress(fonts.getvalue(), quality=5))
+
+
+def extract_in_memory(source_dir, target_dir):
+    """
+        Extraction before the libraries were streamed, each archive is read and decompressed into memory
+    """
+    import brotli
+    for name in LIBRARIES:
+        with open(os.path.join(source_dir, name), "rb") as f:
+            decompressed = brotli.decompress(f.read())
+        if name == "chromium.br":
+            with open(os.path.join(target_dir, "chromium"), "wb") as f:
+                f.write(decompressed)
+        else:
+            with tarfile.open(fileobj=io.BytesIO(decompressed)) as tf:
+                tf.extractall(path=os.path.join(target_dir, name.replace(".tar.br", "")))
+
+
+def run_extraction(mode, source_dir, target_dir):
+    """
+        Extract in this process and print the wall time in ms and the peak RSS increase in MB
+    """
+    import brotli  # noqa: F401
+    sys.path.insert(0, LAYER_PYTHON_PATH)
+    os.environ.setdefault("PYTHONPATH", "")
+    os.environ.setdefault("LD_LIBRARY_PATH", "")
+    from aws_synthetics.selenium.chromium_library import prepare_chromium_library
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if mode == "streaming":
+        prepare_chromium_library(source_dir + os.sep, target_dir + os.sep, LIBRARIES)
+    else:
+        extract_in_memory(source_dir, target_dir)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in KB on Linux
+    print(elapsed * 1000, (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - base_rss) / 1024)
+
+
+def hash_tree(path):
+    digest = hashlib.sha256()
+    for directory, directories, files in os.walk(path):
+        directories.sort()
+        for name in sorted(files):
+            if name.startswith("."):
+                continue
+            file_path = os.path.join(directory, name)
+            digest.update(os.path.relpath(file_path, path).encode("utf-8"))
+            with open(file_path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+    return digest.hexdigest()
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    work_dir = tempfile.mkdtemp()
+    try:
+        source_dir = sys.argv[2] if len(sys.argv) > 2 else None
+        if source_dir is None:
+            source_dir = os.path.join(work_dir, "source")
+            os.makedirs(source_dir)
+            # in its own process, the children inherit the peak RSS of this one
+            subprocess.run([sys.executable, __file__, "--generate", source_dir], check=True)
+        sizes = ["%s %.1f MB" % (name, os.path.getsize(os.path.join(source_dir, name)) / 2 ** 20)
+                 for name in LIBRARIES]
+        print("libraries: %s" % ", ".join(sizes))
+        print("cpus: %s" % os.cpu_count())
+        results = {mode: [] for mode in MODES}
+        trees = {}
+        for run in range(runs):
+            for mode in MODES:
+                target_dir = os.path.join(work_dir, "%s-%s" % (mode, run))
+                os.makedirs(target_dir)
+                output = subprocess.run([sys.executable, __file__, "--extract", mode, source_dir, target_dir],
+                                        check=True, stdout=subprocess.PIPE, universal_newlines=True).stdout
+                elapsed_ms, rss_mb = output.split()[-2:]
+                results[mode].append((float(elapsed_ms), float(rss_mb)))
+                trees[mode] = hash_tree(target_dir)
+                shutil.rmtree(target_dir)
+        for mode in MODES:
+            times = [elapsed for elapsed, _ in results[mode]]
+            rss = [rss_mb for _, rss_mb in results[mode]]
+            print("%-9s cold %4.0f-%4.0f ms, peak RSS +%3.0f-%3.0f MB" % (mode, min(times), max(times), min(rss),
+                                                                          max(rss)))
+        print("extracted trees identical: %s" % (len(set(trees.values())) == 1))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 5 and sys.argv[1] == "--extract":
+        run_extraction(*sys.argv[2:])
+    elif len(sys.argv) == 3 and sys.argv[1] == "--generate":
+        make_synthetic_libraries(sys.argv[2])
+    else:
+        main()
@@ -0,0 +1,146 @@
+"""
+Memory of the HAR entry, page and timing records compared with the dict representation they replaced.
+
+Synthetic CDP events are fed to HarParser in chunks, as the step boundary drains do. The records the builder
+holds are then copied, and converted to the dicts with internal "__" keys that HarBuilder used to keep until
+build(). tracemalloc measures both. The request and response content is shared by the two representations,
+only the memory of the records and dicts themselves differs.
+
+    python har_records_memory.py [requests per page] [pages]
+"""
+
+import copy
+import gc
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "lambda-layers",
+                                "Synthetics_Selenium-32-d7dd6d0228", "python"))
+
+from aws_synthetics.common.har_parser import HarParser  # noqa: E402
+
+EVENT_CHUNK_SIZE = 500
+
+
+def make_events(pages, requests_per_page, seed=7):
+    rnd = random.Random(seed)
+    events = []
+    timestamp = 1000.0
+    wall_time = 1700000000.0
+    for page in range(pages):
+        frame_id = "frame-%s" % page
+        events.append({"method": "Page.frameStartedLoading", "params": {"frameId": frame_id}})
+        for request in range(requests_per_page):
+            timestamp += rnd.random() * 0.01
+            request_id = "%s.%s" % (page, request)
+            url = "https://example.com/%s/%s?q=%s" % (page, request, rnd.random())
+            initiator = rnd.choice([{"type": "parser", "url": "https://example.com/", "lineNumber": 3},
+                                    {"type": "script", "stack": {"callFrames": [
+                                        {"url": "https://example.com/app.js", "lineNumber": 1, "columnNumber": 2,
+                                         "functionName": "load", "scriptId": "9"}]}},
+                                    {"type": "other"}])
+            events.append({"method": "Network.requestWillBeSent", "params": {
+                "requestId": request_id, "frameId": frame_id, "timestamp": timestamp,
+                "wallTime": wall_time + timestamp, "initiator": initiator,
+                "request": {"url": url, "method": "GET", "initialPriority": "High",
+                            "headers": {"Accept": "*/*", "Cookie": "session=%s" % request}}}})
+            events.append({"method": "Network.responseReceived", "params": {
+                "requestId": request_id, "frameId": frame_id, "response": {
+                    "url": url, "status": 200, "statusText": "OK", "mimeType": "text/html", "protocol": "h2",
+                    "headers": {"Content-Type": "text/html", "Content-Length": "1024"},
+                    "requestHeaders": {"Accept": "*/*"}, "encodedDataLength": 300, "connectionId": 7,
+                    "remoteIPAddress": "192.0.2.1", "fromDiskCache": False,
+                    "timing": {"requestTime": timestamp, "dnsStart": 0, "dnsEnd": 1, "connectStart": 1,
+                               "connectEnd": 2, "sslStart": -1, "sslEnd": -1, "sendStart": 2, "sendEnd": 3,
+                               "receiveHeadersEnd": 10, "pushStart": 0}}}})
+            events.append({"method": "Network.dataReceived", "params": {"requestId": request_id, "dataLength": 1024}})
+            timestamp += 0.002
+            events.append({"method": "Network.loadingFinished", "params": {
+                "requestId": request_id, "timestamp": timestamp, "encodedDataLength": 1324}})
+        events.append({"method": "Page.loadEventFired", "params": {"timestamp": timestamp}})
+    return events
+
+
+def entry_as_dict(entry):
+    """
+        Entry in the dict representation used before the records, with its internal keys
+    """
+    entry_dict = entry.to_dict()
+    entry_dict["__requestWillBeSentTime"] = entry.request_will_be_sent_time
+    entry_dict["__wallTime"] = None
+    entry_dict["__frameId"] = None
+    if entry.served_from_cache:
+        entry_dict["__servedFromCache"] = True
+    if entry.receive_headers_end is not None:
+        entry_dict["__receiveHeadersEnd"] = entry.receive_headers_end
+    return entry_dict
+
+
+def page_as_dict(page):
+    page_dict = page.to_dict()
+    page_dict["__frameId"] = page.frame_id
+    page_dict["__wallTime"] = page.wall_time
+    page_dict["__timestamp"] = page.timestamp
+    return page_dict
+
+
+def copy_entry(entry):
+    entry_copy = copy.copy(entry)
+    if entry.timings is not None:
+        entry_copy.timings = copy.copy(entry.timings)
+    return entry_copy
+
+
+def measure(build):
+    """
+        Bytes allocated and still held by the objects build() returns
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        objects = build()
+        gc.collect()
+        held, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return held, objects
+
+
+def main():
+    requests_per_page = int(sys.argv[1]) if len(sys.argv) > 1 else 2500
+    pages = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    events = make_events(pages, requests_per_page)
+
+    parser = HarParser()
+
+    def add_events():
+        for start in range(0, len(events), EVENT_CHUNK_SIZE):
+            parser.add_events(copy.deepcopy(events[start:start + EVENT_CHUNK_SIZE]))
+        return parser
+
+    builder_bytes, _ = measure(add_events)
+    entries = parser._har_builder._entries
+    pages_recorded = parser._har_builder._pages
+
+    records_bytes, records = measure(lambda: ([copy_entry(entry) for entry in entries],
+                                              [copy.copy(page) for page in pages_recorded]))
+    dicts_bytes, dicts = measure(lambda: ([entry_as_dict(entry) for entry in entries],
+                                          [page_as_dict(page) for page in pages_recorded]))
+
+    # both serialize to the same HAR
+    assert [entry.to_dict() for entry in records[0]] == \
+           [{key: value for key, value in entry.items() if not key.startswith("__")} for entry in dicts[0]]
+
+    print("entries: %s, pages: %s" % (len(entries), len(pages_recorded)))
+    print("memory held by the HAR builder: %.1f MB" % (builder_bytes / 2 ** 20))
+    print("%-16s %10s %14s" % ("representation", "total MB", "bytes / entry"))
+    for name, held in (("dict", dicts_bytes), ("slotted records", records_bytes)):
+        print("%-16s %10.2f %14.0f" % (name, held / 2 ** 20, held / len(entries)))
+    print("saved: %.2f MB, %.0f bytes / entry" % ((dicts_bytes - records_bytes) / 2 ** 20,
+                                                  (dicts_bytes - records_bytes) / len(entries)))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@ from .canary_status import CanaryStatus
 from .execution_status import ExecutionStatus
 from .utils import ComplexEncoder
 from .synthetics_configuration import SyntheticsConfiguration
+from .import_profiler import ImportProfiler
 
 
 synthetics_configuration = SyntheticsConfiguration()
@@ -18,5 +19,6 @@ __all__ = [
     "SyntheticsMetricsEmitter",
     "ComplexEncoder",
     "CanaryStatus",
-    "ExecutionStatus"
+    "ExecutionStatus",
+    "ImportProfiler"
 ]
@@ -10,6 +10,8 @@ SYNTHETICS_RUNTIME_VERSION = "syn-python-selenium-2.0"
 SSE_KMS = "aws:kms"
 S3_PREFIX = "s3://"
 SYNTHETICS_REPORT_NAME = "SyntheticsReport"
+# written by CustomerScriptResult.add_report for the broken link checker report
+BROKEN_LINK_CHECKER_REPORT_FILE_NAME = "BrokenLinkCheckerReport.json"
 HAR_FILE_NAME = "results.har.html"
 AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
 AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
@@ -21,6 +23,58 @@ USER_AGENT_SERVICE_VERSION_PREFIX = LIBRARY_VERSION
 PUT_METRIC_LIMIT = 20  # max allowed by CloudWatch
 CLOUDWATCH_NAMESPACE = "CloudWatchSynthetics"
 
+# Artifact compression, artifact types that can be compressed and supported content encodings
+ARTIFACT_TYPE_HAR = "har"
+ARTIFACT_TYPE_LOG = "log"
+ARTIFACT_TYPE_REPORT = "report"
+CONTENT_ENCODING_GZIP = "gzip"
+CONTENT_ENCODING_BROTLI = "br"
+# smaller artifacts are uploaded as they are
+ARTIFACT_COMPRESSION_MIN_SIZE = 1024
+GZIP_COMPRESSION_LEVEL = 6
+BROTLI_COMPRESSION_QUALITY = 5
+ARTIFACT_COMPRESSION_CHUNK_SIZE = 1024 * 1024
+
+# Number of artifacts uploaded to S3 at the same time, the S3 connection pool is sized to match
+S3_UPLOAD_CONCURRENCY = 8
+# Artifacts larger than the threshold are uploaded in parts, with up to S3_MULTIPART_CONCURRENCY parts of
+# S3_MULTIPART_CHUNK_SIZE bytes in flight for each artifact
+S3_MULTIPART_THRESHOLD = 8 * 1024 * 1024
+S3_MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024
+S3_MULTIPART_CONCURRENCY = 4
+# Seconds the S3 client and ownership check of the artifact bucket are reused by a warm container
+S3_BUCKET_CACHE_TTL = 300
+# Number of screenshots uploaded in the background while the canary steps keep running
+SCREENSHOT_UPLOAD_CONCURRENCY = 2
+# Number of uploaded screenshot hashes a warm container remembers for deduplication
+SCREENSHOT_CONTENT_INDEX_MAX_SIZE = 1000
+
+# Attempts to upload an artifact, with exponential backoff and full jitter between them
+S3_UPLOAD_MAX_ATTEMPTS = 4
+S3_UPLOAD_RETRY_BASE_DELAY = 0.2
+S3_UPLOAD_RETRY_MAX_DELAY = 2
+# Seconds of the remaining Lambda time left for the canary to finish after the last upload is started
+S3_UPLOAD_DEADLINE_MARGIN = 3
+# Invocations of a warm container that try to upload an artifact before it is dropped
+S3_UPLOAD_MAX_RESUME_ATTEMPTS = 3
+# Artifacts that failed to upload and their manifest, kept in the artifacts path for the next invocation
+UPLOAD_RETRY_DIR_NAME = ".synthetics-upload-retry"
+UPLOAD_MANIFEST_NAME = ".synthetics-upload-manifest.json"
+
+# Name of the archive holding all artifacts of a run when artifact bundling is enabled, and of the index
+# manifest stored as its first member
+ARTIFACT_BUNDLE_NAME = "artifacts.tar.gz"
+ARTIFACT_BUNDLE_MANIFEST_NAME = "manifest.json"
+ARTIFACT_BUNDLE_CONTENT_TYPE = "application/gzip"
+
+# Artifact with the import times of the customer canary modules when import profiling is enabled, and number of
+# slowest imports listed in the Synthetics report
+IMPORT_PROFILE_FILE_NAME = "import-profile.txt"
+IMPORT_PROFILE_SUMMARY_SIZE = 5
+
+# Runtime phases done after the Synthetics report is written, they are returned in the result of the run instead
+RUNTIME_TEARDOWN_PHASES = ("reportWriting", "artifactUpload", "browserClose")
+
 # ######################### FOR UNIT TESTS ###################################
 UNIT_TEST_MODE = os.getenv("UNIT_TEST_MODE")
 if UNIT_TEST_MODE == "True":
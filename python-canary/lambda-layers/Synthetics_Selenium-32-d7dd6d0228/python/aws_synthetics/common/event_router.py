@@ -0,0 +1,33 @@
+class EventRouter:
+    """
+        Routes recorded Page and Network events to the handlers registered for their method. Consumers
+        register their handlers once, then every event is looked up a single time and handed to all of them.
+    """
+
+    def __init__(self, handlers=None):
+        self._handlers = {}
+        if handlers is not None:
+            self.add_handlers(handlers)
+
+    def add_handler(self, method, handler):
+        """
+            Register handler to be called with the params of every event of the given method
+        """
+        self._handlers.setdefault(method, []).append(handler)
+
+    def add_handlers(self, handlers):
+        """
+            Register a dictionary of method to handler
+        """
+        for method, handler in handlers.items():
+            self.add_handler(method, handler)
+
+    def route(self, events):
+        handlers = self._handlers
+        for event in events:
+            method_handlers = handlers.get(event["method"])
+            if method_handlers is None:
+                continue
+            params = event["params"]
+            for handler in method_handlers:
+                handler(params)
@@ -4,16 +4,17 @@ Their license is included in the attribution doc. This was reviewed and approved
 """
 
 import json
-import asyncio
 import logging
 import uuid
 from datetime import datetime
 from .entry_from_response import populate_entry_from_response, finalize_entry
 from .cookies import parse_request_cookies, parse_response_cookies
 from .headers import get_header_value, parse_header
-from .html_utils import get_html_template
+from .html_utils import get_html_template, write_html_template
+from .har_records import HarEntry, HarPage
 from urllib.parse import urlparse, parse_qs, urlunparse
 from ..constants import LIBRARY_VERSION
+from ..event_router import EventRouter
 import re
 
 logger = logging.getLogger(__name__)
@@ -60,22 +61,410 @@ def parse_post_data(content_type, post_data):
 
 
 def add_from_first_request(page, params):
-    if page.get("__timestamp") is None:
-        page["__wallTime"] = params.get("wallTime")
-        page["__timestamp"] = params.get("timestamp")
-        page["startedDateTime"] = datetime.fromtimestamp(params['wallTime']).isoformat()
+    if page.timestamp is None:
+        page.wall_time = params.get("wallTime")
+        page.timestamp = params.get("timestamp")
+        page.started_date_time = datetime.fromtimestamp(params['wallTime']).isoformat()
         #  URL is better than blank, and it's what devtools uses.
-        page["title"] = params["request"]["url"] if page.get("title") == "" else page["title"]
+        page.title = params["request"]["url"] if page.title == "" else page.title
+
+
+class HarBuilder:
+    """
+        Builds a HAR log incrementally from Page and Network events. Events can be added as they are
+        recorded, only the HAR entries and pages and their lookup indexes are kept in memory.
+    """
+
+    def __init__(self):
+        self._ignored_reqs = set()
+        self._rootframe_mappings = {}
+        self._pages = []
+        # first page recorded for each root frame id
+        self._pages_by_frame_id = {}
+        self._entries = []
+        # entries in `entries` order for each _requestId, the first one is the lookup result
+        self._entries_by_request_id = {}
+        self._entries_without_page = []
+        self._responses_without_page = []
+        self._params_without_page = []
+        self._current_page_id = None
+        # page referenced by the most recent event
+        self._page = None
+        self._event_handlers = {
+            "Page.frameStartedLoading": self._on_frame_navigation,
+            "Page.frameScheduledNavigation": self._on_frame_navigation,
+            "Page.navigatedWithinDocument": self._on_navigated_within_document,
+            "Page.loadEventFired": self._on_load_event_fired,
+            "Page.domContentEventFired": self._on_dom_content_event_fired,
+            "Page.frameAttached": self._on_frame_attached,
+            "Network.requestWillBeSent": self._on_request_will_be_sent,
+            "Network.requestServedFromCache": self._on_request_served_from_cache,
+            "Network.responseReceived": self._on_response_received,
+            "Network.dataReceived": self._on_data_received,
+            "Network.loadingFinished": self._on_loading_finished,
+            "Network.loadingFailed": self._on_loading_failed,
+            "Network.resourceChangedPriority": self._on_resource_changed_priority
+        }
+
+    def _index_entry(self, entry):
+        self._entries_by_request_id.setdefault(entry.request_id, []).append(entry)
+
+    def _find_entry(self, request_id):
+        indexed = self._entries_by_request_id.get(request_id)
+        return indexed[0] if indexed else None
+
+    def _pop_entry(self, request_id):
+        indexed = self._entries_by_request_id.get(request_id)
+        if not indexed:
+            return None
+        entry = indexed.pop(0)
+        if not indexed:
+            del self._entries_by_request_id[request_id]
+        return entry
+
+    def _redirect_entry(self, request_id):
+        # the redirected entry stays in `entries`, it is only looked up by the "r" suffixed id from now on
+        entry = self._pop_entry(request_id)
+        if entry is not None:
+            entry.request_id += "r"
+            self._index_entry(entry)
+        return entry
+
+    def get_event_handlers(self):
+        """
+            Returns the handler for each Page and Network event the HAR is built from
+        """
+        return self._event_handlers
+
+    def _on_navigated_within_document(self, params):
+        # same document navigations have always been recorded with a false title
+        self._on_frame_navigation(params, title=False)
+
+    def _on_frame_navigation(self, params, title=""):
+        frame_id = params["frameId"]
+        rootframe = self._rootframe_mappings.get(frame_id, frame_id)
+
+        if rootframe in self._pages_by_frame_id:
+            return
+
+        self._current_page_id = str(uuid.uuid4())
+        page = HarPage(self._current_page_id, title, rootframe)
+        self._page = page
+        self._pages.append(page)
+        self._pages_by_frame_id[rootframe] = page
+        # do we have any unmapped requests, add them
+        if len(self._entries_without_page) > 0:
+            # update page
+            for entry in self._entries_without_page:
+                entry.pageref = page.id
+            if len(self._pages) == 1:
+                # unmapped requests only exist before the first page, index them once
+                for entry in self._entries_without_page:
+                    self._index_entry(entry)
+            self._entries.extend(self._entries_without_page)
+            add_from_first_request(page, self._params_without_page[0])
+
+        if len(self._responses_without_page) > 0:
+            for response_params in self._responses_without_page:
+                entry = self._find_entry(response_params.get("requestId"))
+                if entry is not None:
+                    populate_entry_from_response(entry, response_params.get("response"), page)
+                else:
+                    logger.debug("Couldn't find matching request for response")
+
+    def _on_request_will_be_sent(self, params):
+        request = params["request"]
+        request_id = params["requestId"]
+        if not (request["url"].startswith("http") or request["url"].startswith("https")):
+            self._ignored_reqs.add(request_id)
+            return
+
+        page = self._pages[-1] if len(self._pages) > 0 else None
+        self._page = page
+        cookie_header = get_header_value(request["headers"], "Cookie")
+        url = urlparse(request["url"] + request.get("urlFragment", ""))
+        post_data = parse_post_data(
+            get_header_value(request["headers"], "Content-type"), request.get("postData"))
+        req = {
+            "method": request["method"],
+            "url": urlunparse(url),
+            "queryString": parse_qs(url.query),
+            "postData": post_data,
+            "headersSize": -1,
+            "bodySize": len(request.get("postData", "")),
+            "cookies": parse_request_cookies(cookie_header),
+            "headers": parse_header(request["headers"])
+        }
+        # The object initiator change according to its type
+        initiator_type = params.get("initiator", {}).get("type")
+        entry = HarEntry(request_id=params.get("requestId"),
+                         pageref=self._current_page_id,
+                         request=req,
+                         initial_priority=request.get("initialPriority"),
+                         initiator_detail=str(params.get("initiator")),
+                         initiator_type=initiator_type,
+                         request_will_be_sent_time=params.get("timestamp"))
+        if initiator_type == "parser":
+            entry.initiator = params["initiator"]["url"]
+            entry.initiator_line = params["initiator"].get("lineNumber", 0) + 1  # Because lineNumber is 0 based
+
+        if initiator_type == "script":
+            if len(params.get("initiator", {}).get("stack", {}).get("callFrames", [])) > 0:
+                top_call_frame = params["initiator"]["stack"]["callFrames"][0]
+                entry.initiator = top_call_frame["url"]
+                entry.initiator_line = top_call_frame["lineNumber"] + 1  # Because lineNumber is 0 based
+                entry.initiator_column = top_call_frame["columnNumber"] + 1  # Because columnNumber is 0 based
+                entry.initiator_function_name = top_call_frame["functionName"]
+                entry.initiator_script_id = top_call_frame["scriptId"]
+
+        if params.get("redirectResponse") is not None:
+            prev_entry = self._redirect_entry(request_id)
+            if prev_entry is not None:
+                populate_entry_from_response(prev_entry, params["redirectResponse"], page)
+            else:
+                logger.info("Could not find original request for redirect response: %s", request_id)
+
+        if page is None:
+            logger.info("Request will be sent with requestId %s that can't be mapped to any page at the moment",
+                        request_id)
+            self._entries_without_page.append(entry)
+            self._params_without_page.append(params)
+            return
+
+        self._entries.append(entry)
+        self._index_entry(entry)
+        # this is the first request for this page, so set timestamp of page.
+        add_from_first_request(page, params)
+        # wallTime is not necessarily monotonic, timestamp is.
+        # So calculate startedDateTime from timestamp diffs.
+        entry_secs = page.wall_time + (params["timestamp"] - page.timestamp)
+        entry.started_date_time = datetime.fromtimestamp(entry_secs).isoformat()
+
+    def _on_request_served_from_cache(self, params):
+        request_id = params["requestId"]
+        if len(self._pages) < 1:
+            # we haven't loaded any pages yet
+            return
+
+        if request_id in self._ignored_reqs:
+            return
+
+        entry = self._find_entry(request_id)
+        if entry is None:
+            logger.info("Received requestServedFromCache for requestId %s with no matching request", request_id)
+            return
+
+        entry.served_from_cache = True
+        entry.cache["beforeRequest"] = {
+            "lastAccess": "",
+            "eTag": "",
+            "hitCount": 0
+        }
+
+    def _on_response_received(self, params):
+        request_id = params["requestId"]
+        if len(self._pages) < 1:
+            # we haven't loaded any pages yet
+            self._responses_without_page.append(params)
+            return
+
+        if request_id in self._ignored_reqs:
+            return
+
+        entry = self._find_entry(request_id)
+
+        if entry is None:
+            logger.info("Received network response for requestId %s with no matching request", request_id)
+            return
+
+        frame_id = self._rootframe_mappings.get(params.get("frameId"), params.get("frameId"))
+        page = self._pages_by_frame_id.get(frame_id) or self._pages[-1]
+        self._page = page
+        if page is None:
+            logger.info("Received network response for requestId %s that cannot be mapped to any page",
+                        request_id)
+            return
+
+        try:
+            populate_entry_from_response(entry, params["response"], page)
+        except:
+            logger.error("Error parsing response: %s", params)
+            raise
+
+    def _on_data_received(self, params):
+        request_id = params["requestId"]
+        if len(self._pages) < 1:
+            # we haven't loaded any pages yet
+            return
+
+        if request_id in self._ignored_reqs:
+            return
+
+        entry = self._find_entry(request_id)
+        if entry is None:
+            logger.info("Received network data for requestId %s with no matching request", request_id)
+            return
+
+        if entry.response is not None:
+            entry.response["content"]["size"] += params["dataLength"]
+
+    def _on_loading_finished(self, params):
+        request_id = params["requestId"]
+        if len(self._pages) < 1:
+            # we haven't loaded any pages yet
+            return
+
+        if request_id in self._ignored_reqs:
+            self._ignored_reqs.remove(request_id)
+            return
+
+        # the entry stays indexed, data, priority and cache events can still arrive after the request completed
+        entry = self._find_entry(request_id)
+        if entry is None:
+            logger.info("Network loading finished for requestId %s with no matching request", request_id)
+            return
+
+        finalize_entry(entry, params)
+
+    def _on_load_event_fired(self, params):
+        if len(self._pages) < 1:
+            # we haven't loaded any pages yet
+            return
+
+        page = self._pages[-1]
+        self._page = page
+        if params.get("timestamp") is not None and page.timestamp is not None:
+            page.page_timings["onLoad"] = (params["timestamp"] - page.timestamp) * 1000
+
+    def _on_dom_content_event_fired(self, params):
+        if len(self._pages) < 1:
+            # we haven't loaded any pages yet
+            return
+
+        page = self._pages[-1]
+        self._page = page
+        if params.get("timestamp") is not None and page.timestamp is not None:
+            page.page_timings["onContentLoad"] = (params["timestamp"] - page.timestamp) * 1000
+
+    def _on_frame_attached(self, params):
+        frame_id = params["frameId"]
+        parent_id = params["parentFrameId"]
+        self._rootframe_mappings[frame_id] = parent_id
+        grandparent_id = self._rootframe_mappings.get(parent_id)
+        while grandparent_id is not None:
+            self._rootframe_mappings[frame_id] = grandparent_id
+            grandparent_id = self._rootframe_mappings.get(grandparent_id)
+
+    def _on_loading_failed(self, params):
+        request_id = params.get("requestId")
+        if request_id in self._ignored_reqs:
+            self._ignored_reqs.remove(request_id)
+            return
+
+        # the entry stays indexed, data, priority and cache events can still arrive after the request completed
+        entry = self._find_entry(request_id)
+        if entry is None:
+            logger.info("Network loading failed for requestId %s with no matching request", request_id)
+            return
+
+        if params["errorText"] == "net::ERR_ABORTED":
+            finalize_entry(entry, params)
+            logger.info("Loading was canceled due to Chrome or a user action for requestId %s", request_id)
+            return
+
+        # This could be due to incorrect domain name etc. Sad, but unfortunately not something
+        # that a HAR file can represent
+        logger.info("Failed to load url %s (cancelled: %s)", entry.request["url"], params["canceled"])
+
+    def _on_resource_changed_priority(self, params):
+        request_id = params["requestId"]
+        entry = self._find_entry(request_id)
+
+        if entry is None:
+            logger.info("Received resourceChangedPriority for requestId %s with no matching request",
+                        request_id)
+            return
+
+        entry.priority = params["newPriority"]
+
+    def build(self):
+        """
+            Returns the HAR log for all events added so far. The builder can not be used afterwards.
+        """
+        pages, entries = self._finish()
+        har = self._get_har_log()
+        har["log"]["pages"] = [_page.to_dict() for _page in pages]
+        har["log"]["entries"] = [_entry.to_dict() for _entry in entries]
+        return har
+
+    def write(self, file):
+        """
+            Writes the HAR log for all events added so far to file as JSON, one entry at a time, so the whole
+            document is never held in memory. The output is the same as json.dumps of build().
+            The builder can not be used afterwards.
+        """
+        pages, entries = self._finish()
+        log = self._get_har_log()["log"]
+        file.write('{"log": {"version": %s, "creator": %s, "pages": [' % (
+            json.dumps(log["version"]), json.dumps(log["creator"])))
+        file.write(", ".join(json.dumps(_page.to_dict()) for _page in pages))
+        file.write('], "entries": [')
+        # consume the entries from the front so each one can be released once written
+        entries.reverse()
+        separator = ""
+        while entries:
+            file.write(separator)
+            file.write(json.dumps(entries.pop().to_dict()))
+            separator = ", "
+        file.write("]}}")
+
+    def _finish(self):
+        """
+            Returns the pages and complete entries of the HAR, with pages numbered in order
+        """
+        logger.debug("Building HAR from %s entries", len(self._entries))
+        # dropping resources from disk cache
+        # entries = list(filter(lambda _entry: _entry["cache"]["beforeRequest"] is None, entries))
+
+        # dropping incomplete request
+        entries = [_entry for _entry in self._entries if _entry.response is not None]
+
+        pagerefs = set(_entry.pageref for _entry in entries)
+        page_result = []
+        for _page in self._pages:
+            has_entry = _page.id in pagerefs
+            if has_entry:
+                # the page referenced by the most recent event is listed for every non-empty page
+                page_result.append(self._page)
+            else:
+                logger.info("Skipping empty page")
 
+        pageref_mapping_result = {}
+        for _index, _page in enumerate(page_result):
+            pageref_mapping_result[_page.id] = "page_{}".format(_index + 1)
+            _page.id = pageref_mapping_result[_page.id]
 
-def remove_internal_props(obj: dict):
-    # __ properties are only for internal use,
-    # _ properties are custom properties for the HAR
-    for key in list(obj):
-        if key.startswith("__"):
-            del obj[key]
+        for _entry in entries:
+            _entry.pageref = pageref_mapping_result.get(_entry.pageref)
 
-    return obj
+        self._entries = []
+        self._pages = []
+        self._entries_by_request_id = {}
+        self._pages_by_frame_id = {}
+        return page_result, entries
+
+    def _get_har_log(self):
+        return {
+            "log": {
+                "version": "1.2",  # http spec version
+                "creator": {
+                    "name": "CloudWatch Synthetics",
+                    "version": LIBRARY_VERSION  # har parser library version
+                },
+                "pages": [],
+                "entries": []
+            }
+        }
 
 
 class HarParser:
@@ -87,9 +476,12 @@ class HarParser:
         self._capture_mimetypes = kwargs.get("capture_mimetypes") or ["text/html", "application/json"]
         self._inprogress = False
         self._har_contents = None
+        # handlers of other consumers served by the same pass over the events, method and handler pairs
+        self._event_handlers = []
         self._cleanup()
 
     def _cleanup(self):
+        self._new_har_builder()
         self._network_events = []
         self._page_events = []
         self._response_body_promises = []
@@ -230,354 +622,45 @@ class HarParser:
         else:
             return get_html_template(json.dumps(self._har_contents), self._region)
 
+    def add_event_handler(self, method, handler):
+        """
+            Call handler with the params of every added event of the given method, next to building the HAR
+        """
+        self._event_handlers.append((method, handler))
+        self._event_router.add_handler(method, handler)
+
+    def add_events(self, events):
+        """
+            Add recorded Page and Network events to the HAR being built
+        """
+        self._event_router.route(events)
+
+    def build_har(self):
+        """
+            Build the HAR from all events added so far and start a new one
+        """
+        self._har_contents = self._har_builder.build()
+        self._new_har_builder()
+        return self._har_contents
+
+    def write_har_html(self, file):
+        """
+            Write the HTML report of the HAR from all events added so far to file and start a new one.
+            The HAR JSON is streamed into the report instead of being serialized as a whole.
+        """
+        write_html_template(file, self._har_builder.write, self._region)
+        self._new_har_builder()
+
+    def _new_har_builder(self):
+        self._har_builder = HarBuilder()
+        self._event_router = EventRouter(self._har_builder.get_event_handlers())
+        for method, handler in self._event_handlers:
+            self._event_router.add_handler(method, handler)
+
     def _generate_har(self, events):
         logger.debug("Generating HAR from events")
         logger.debug("Events list size: %s", len(events))
 
-        ignored_reqs = set()
-        rootframe_mappings = {}
-        pages = []
-        entries = []
-        entries_without_page = []
-        responses_without_page = []
-        params_without_page = []
-        current_page_id = None
-
-        for event in events:
-            params = event["params"]
-            method = event["method"]
-
-            if not re.match(r"^(Page|Network)\..+", method):
-                continue
-
-            if method == "Page.frameStartedLoading" or method == "Page.frameScheduledNavigation" or method == "Page.navigatedWithinDocument":
-                logger.debug("method: %s" % method)
-                frame_id = params["frameId"]
-                rootframe = rootframe_mappings.get(frame_id, frame_id)
-
-                if any(_page.get("__frameId") == rootframe for _page in pages):
-                    continue
-
-                current_page_id = str(uuid.uuid4())
-                title = method == params.get("url") if method == "Page.navigatedWithinDocument" else ""
-                page = {
-                    "id": current_page_id,
-                    "startedDateTime": '',
-                    "title": title,
-                    "pageTimings": {},
-                    "__frameId": rootframe
-                }
-                pages.append(page)
-                # do we have any unmapped requests, add them
-                if len(entries_without_page) > 0:
-                    # update page
-                    for entry in entries_without_page:
-                        entry["pageref"] = page["id"]
-                    entries = entries + entries_without_page
-                    add_from_first_request(page, params_without_page[0])
-
-                if len(responses_without_page) > 0:
-                    for params in responses_without_page:
-                        filtered_entries = list(
-                            filter(lambda e: e.get("_requestId") == params.get("requestId"), entries))
-                        if len(filtered_entries) > 0:
-                            entry = filtered_entries[0]
-                            populate_entry_from_response(entry, params.get("response"), page)
-                        else:
-                            logger.debug("Couldn't find matching request for response")
-
-                # done
-
-            # end
-            elif method == "Network.requestWillBeSent":
-                logger.debug("method: %s" % method)
-                request = params["request"]
-                request_id = params["requestId"]
-                if not (request["url"].startswith("http") or request["url"].startswith("https")):
-                    ignored_reqs.add(request_id)
-                    continue
-
-                page = pages[-1] if len(pages) > 0 else None
-                cookie_header = get_header_value(request["headers"], "Cookie")
-                url = urlparse(request["url"] + request.get("urlFragment", ""))
-                post_data = parse_post_data(
-                    get_header_value(request["headers"], "Content-type"), request.get("postData"))
-                req = {
-                    "method": request["method"],
-                    "url": urlunparse(url),
-                    "queryString": parse_qs(url.query),
-                    "postData": post_data,
-                    "headersSize": -1,
-                    "bodySize": len(request.get("postData", "")),
-                    "cookies": parse_request_cookies(cookie_header),
-                    "headers": parse_header(request["headers"])
-                }
-                entry = {
-                    "cache": {},
-                    "startedDateTime": "",
-                    "__requestWillBeSentTime": params.get("timestamp"),
-                    "__wallTime": params.get("wallTime"),
-                    "_requestId": params.get("requestId"),
-                    "__frameId": params.get("frameId"),
-                    "_initialPriority": request.get("initialPriority"),
-                    "_priority": request.get("initialPriority"),
-                    "pageref": current_page_id,
-                    "request": req,
-                    "time": 0,
-                    "_initiator_detail": str(params.get("initiator")),
-                    "_initiator_type": params.get("initiator", {}).get("type")
-                }
-                # The object initiator change according to its type
-                initiator_type = params.get("initiator", {}).get("type")
-                if initiator_type == "parser":
-                    entry["_initiator"] = params["initiator"]["url"]
-                    entry["_initiator_line"] = params["initiator"].get("lineNumber", 0) + 1  # Because lineNumber is 0 based
-
-                if initiator_type == "script":
-                    if len(params.get("initiator", {}).get("stack", {}).get("callFrames", [])) > 0:
-                        top_call_frame = params["initiator"]["stack"]["callFrames"][0]
-                        entry["_initiator"] = top_call_frame["url"]
-                        entry["_initiator_line"] = top_call_frame["lineNumber"] + 1  # Because lineNumber is 0 based
-                        entry["_initiator_column"] = top_call_frame[
-                                                         "columnNumber"] + 1  # Because columnNumber is 0 based
-                        entry["_initiator_function_name"] = top_call_frame["functionName"]
-                        entry["_initiator_script_id"] = top_call_frame["scriptId"]
-
-                if params.get("redirectResponse") is not None:
-                    prev_entry = find_object(entries, "_requestId", request_id)
-                    if prev_entry is not None:
-                        prev_entry["_requestId"] += "r"
-                        populate_entry_from_response(prev_entry, params["redirectResponse"], page)
-                    else:
-                        logger.info("Could not find original request for redirect response: %s", request_id)
-
-                if page is None:
-                    logger.info("Request will be sent with requestId %s that can't be mapped to any page at the moment",
-                                request_id)
-                    entries_without_page.append(entry)
-                    params_without_page.append(params)
-                    continue
-
-                entries.append(entry)
-                # this is the first request for this page, so set timestamp of page.
-                add_from_first_request(page, params)
-                # wallTime is not necessarily monotonic, timestamp is.
-                # So calculate startedDateTime from timestamp diffs.
-                entry_secs = page["__wallTime"] + (params["timestamp"] - page["__timestamp"])
-                entry["startedDateTime"] = datetime.fromtimestamp(entry_secs).isoformat()
-            # end
-
-            elif method == "Network.requestServedFromCache":
-                logger.debug("method: %s" % method)
-                request_id = params["requestId"]
-                if len(pages) < 1:
-                    # we haven't loaded any pages yet
-                    continue
-
-                if request_id in ignored_reqs:
-                    continue
-
-                entry = find_object(entries, "_requestId", request_id)
-                if entry is None:
-                    logger.info("Received requestServedFromCache for requestId %s with no matching request", request_id)
-                    continue
-
-                entry["__servedFromCache"] = True
-                entry["cache"]["beforeRequest"] = {
-                    "lastAccess": "",
-                    "eTag": "",
-                    "hitCount": 0
-                }
-
-            # end
-
-            elif method == "Network.responseReceived":
-                logger.debug("method: %s" % method)
-                request_id = params["requestId"]
-                if len(pages) < 1:
-                    # we haven't loaded any pages yet
-                    responses_without_page.append(params)
-                    continue
-
-                if request_id in ignored_reqs:
-                    continue
-
-                entry = find_object(entries, "_requestId", request_id)
-                if entry is None:
-                    entry = find_object(entries_without_page, "_requestId", request_id)
-
-                if entry is None:
-                    logger.info("Received network response for requestId %s with no matching request", request_id)
-                    continue
-
-                frame_id = rootframe_mappings.get(params.get("frameId"), params.get("frameId"))
-                page = find_object(pages, "__frameId", frame_id) or pages[-1]
-                if page is None:
-                    logger.info("Received network response for requestId %s that cannot be mapped to any page",
-                                request_id)
-                    continue
-
-                try:
-                    populate_entry_from_response(entry, params["response"], page)
-                except:
-                    logger.error("Error parsing response: %s", params)
-                    raise
-
-            # end
-
-            elif method == "Network.dataReceived":
-                logger.debug("method: %s" % method)
-                request_id = params["requestId"]
-                if len(pages) < 1:
-                    # we haven't loaded any pages yet
-                    continue
-
-                if request_id in ignored_reqs:
-                    continue
-
-                entry = find_object(entries, "_requestId", request_id)
-                if entry is None:
-                    logger.info("Received network data for requestId %s with no matching request", request_id)
-                    continue
-
-                if entry["response"] is not None:
-                    entry["response"]["content"]["size"] += params["dataLength"]
-
-            # end
-
-            elif method == "Network.loadingFinished":
-                logger.debug("method: %s" % method)
-                request_id = params["requestId"]
-                if len(pages) < 1:
-                    # we haven't loaded any pages yet
-                    continue
-
-                if request_id in ignored_reqs:
-                    ignored_reqs.remove(request_id)
-                    continue
-
-                entry = find_object(entries, "_requestId", request_id)
-                if entry is None:
-                    logger.info("Network loading finished for requestId %s with no matching request", request_id)
-                    continue
-
-                finalize_entry(entry, params)
-
-            # end
-
-            elif method == "Page.loadEventFired":
-                logger.debug("method: %s" % method)
-                if len(pages) < 1:
-                    # we haven't loaded any pages yet
-                    continue
-
-                page = pages[-1]
-                if params.get("timestamp") is not None and page.get("__timestamp") is not None:
-                    page["pageTimings"]["onLoad"] = (params["timestamp"] - page["__timestamp"]) * 1000
-
-            # end
-
-            elif method == "Page.domContentEventFired":
-                logger.debug("method: %s" % method)
-                if len(pages) < 1:
-                    # we haven't loaded any pages yet
-                    continue
-
-                page = pages[-1]
-                if params.get("timestamp") is not None and page.get("__timestamp") is not None:
-                    page["pageTimings"]["onContentLoad"] = (params["timestamp"] - page["__timestamp"]) * 1000
-
-            # end
-
-            elif method == "Page.frameAttached":
-                logger.debug("method: %s" % method)
-                frame_id = params["frameId"]
-                parent_id = params["parentFrameId"]
-                rootframe_mappings[frame_id] = parent_id
-                grandparent_id = rootframe_mappings.get(parent_id)
-                while grandparent_id is not None:
-                    rootframe_mappings[frame_id] = grandparent_id
-                    grandparent_id = rootframe_mappings.get(grandparent_id)
-            # end
-
-            elif method == "Network.loadingFailed":
-                logger.debug("method: %s" % method)
-                request_id = params.get("requestId")
-                if request_id in ignored_reqs:
-                    ignored_reqs.remove(request_id)
-                    continue
-
-                entry = find_object(entries, "_requestId", request_id)
-                if entry is None:
-                    logger.info("Network loading failed for requestId %s with no matching request", request_id)
-                    continue
-
-                if params["errorText"] == "net::ERR_ABORTED":
-                    finalize_entry(entry, params)
-                    logger.info("Loading was canceled due to Chrome or a user action for requestId %s", request_id)
-                    continue
-
-                # This could be due to incorrect domain name etc. Sad, but unfortunately not something
-                # that a HAR file can represent
-                logger.info("Failed to load url %s (cancelled: %s)", entry["request"]["url"], params["canceled"])
-                entries = list(filter(lambda _entry: _entry.get("requestId") != request_id, entries))
-
-            # end
-
-            elif method == "Network.resourceChangedPriority":
-                logger.debug("method: %s" % method)
-                request_id = params["requestId"]
-                entry = find_object(entries, "_requestId", request_id)
-
-                if entry is None:
-                    logger.info("Received resourceChangedPriority for requestId %s with no matching request",
-                                request_id)
-                    continue
-
-                entry["_priority"] = event["params"]["newPriority"]
-
-            # end
-            else:
-                logger.debug("method: %s" % method)
-                # logger.debug("Ignored method: %s", method)
-                # Keep the old functionality and log unknown events
-                ignored_reqs.add(method)
-
-        # dropping resources from disk cache
-        # entries = list(filter(lambda _entry: _entry["cache"]["beforeRequest"] is None, entries))
-
-        # dropping incomplete request
-        entries = list(filter(lambda _entry: _entry.get("response") is not None, entries))
-
-        # delete internal props
-        entries = list(map(remove_internal_props, entries))
-        pages = list(map(remove_internal_props, pages))
-
-        page_result = []
-        for _page in pages:
-            has_entry = any(_entry["pageref"] == _page["id"] for _entry in entries)
-            if has_entry:
-                page_result.append(page)
-            else:
-                logger.info("Skipping empty page")
-        pages = page_result
-
-        pageref_mapping_result = {}
-        for _index, _page in enumerate(pages):
-            pageref_mapping_result[_page["id"]] = "page_{}".format(_index + 1)
-            _page["id"] = pageref_mapping_result[_page["id"]]
-
-        for _entry in entries:
-            _entry["pageref"] = pageref_mapping_result.get(_entry["pageref"])
-
-        return {
-            "log": {
-                "version": "1.2",  # http spec version
-                "creator": {
-                    "name": "CloudWatch Synthetics",
-                    "version": LIBRARY_VERSION  # har parser library version
-                },
-                "pages": pages,
-                "entries": entries
-            }
-        }
+        har_builder = HarBuilder()
+        EventRouter(har_builder.get_event_handlers()).route(events)
+        return har_builder.build()
@@ -0,0 +1,128 @@
+class HarPage:
+    """
+        Page recorded while building a HAR. Only the HAR 1.2 fields are serialized, the wall time and
+        timestamp of the first request are kept to calculate entry start times.
+    """
+    __slots__ = ("id", "started_date_time", "title", "page_timings", "frame_id", "wall_time", "timestamp")
+
+    def __init__(self, id, title, frame_id):
+        self.id = id
+        self.started_date_time = ""
+        self.title = title
+        self.page_timings = {}
+        self.frame_id = frame_id
+        self.wall_time = None
+        self.timestamp = None
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "startedDateTime": self.started_date_time,
+            "title": self.title,
+            "pageTimings": self.page_timings
+        }
+
+
+class HarTimings:
+    """
+        Timings of a HAR entry in milliseconds
+    """
+    __slots__ = ("blocked", "dns", "connect", "send", "wait", "receive", "ssl", "queued", "comment")
+
+    def __init__(self, blocked=-1, dns=-1, connect=-1, send=0, wait=0, receive=0, ssl=-1, comment=None):
+        self.blocked = blocked
+        self.dns = dns
+        self.connect = connect
+        self.send = send
+        self.wait = wait
+        self.receive = receive
+        self.ssl = ssl
+        self.queued = None
+        self.comment = comment
+
+    def to_dict(self):
+        timings = {
+            "blocked": self.blocked,
+            "dns": self.dns,
+            "connect": self.connect,
+            "send": self.send,
+            "wait": self.wait,
+            "receive": self.receive,
+            "ssl": self.ssl
+        }
+        if self.queued is not None:
+            timings["_queued"] = self.queued
+        if self.comment is not None:
+            timings["comment"] = self.comment
+        return timings
+
+
+class HarEntry:
+    """
+        Request recorded while building a HAR. Optional HAR fields are None until they are known and are
+        left out of the serialized entry, internal fields are never serialized.
+    """
+    __slots__ = ("cache", "started_date_time", "request_id", "initial_priority", "priority", "pageref", "request",
+                 "time", "initiator_detail", "initiator_type", "initiator", "initiator_line", "initiator_column",
+                 "initiator_function_name", "initiator_script_id", "response", "connection", "server_ip_address",
+                 "timings", "request_time", "was_pushed",
+                 # internal
+                 "request_will_be_sent_time", "served_from_cache", "receive_headers_end")
+
+    def __init__(self, request_id, pageref, request, initial_priority, initiator_detail, initiator_type,
+                 request_will_be_sent_time):
+        self.cache = {}
+        self.started_date_time = ""
+        self.request_id = request_id
+        self.initial_priority = initial_priority
+        self.priority = initial_priority
+        self.pageref = pageref
+        self.request = request
+        self.time = 0
+        self.initiator_detail = initiator_detail
+        self.initiator_type = initiator_type
+        self.initiator = None
+        self.initiator_line = None
+        self.initiator_column = None
+        self.initiator_function_name = None
+        self.initiator_script_id = None
+        self.response = None
+        self.connection = None
+        self.server_ip_address = None
+        self.timings = None
+        self.request_time = None
+        self.was_pushed = None
+        self.request_will_be_sent_time = request_will_be_sent_time
+        self.served_from_cache = False
+        self.receive_headers_end = None
+
+    def to_dict(self):
+        entry = {
+            "cache": self.cache,
+            "startedDateTime": self.started_date_time,
+            "_requestId": self.request_id,
+            "_initialPriority": self.initial_priority,
+            "_priority": self.priority,
+            "pageref": self.pageref,
+            "request": self.request,
+            "time": self.time,
+            "_initiator_detail": self.initiator_detail,
+            "_initiator_type": self.initiator_type
+        }
+        if self.initiator is not None:
+            entry["_initiator"] = self.initiator
+            entry["_initiator_line"] = self.initiator_line
+        if self.initiator_column is not None:
+            entry["_initiator_column"] = self.initiator_column
+            entry["_initiator_function_name"] = self.initiator_function_name
+            entry["_initiator_script_id"] = self.initiator_script_id
+        if self.response is not None:
+            entry["response"] = self.response
+            entry["connection"] = self.connection
+            entry["serverIPAddress"] = self.server_ip_address
+            entry["timings"] = self.timings.to_dict()
+            if self.request_time is not None:
+                entry["_requestTime"] = self.request_time
+            if self.was_pushed is not None:
+                entry["_was_pushed"] = self.was_pushed
+        return entry
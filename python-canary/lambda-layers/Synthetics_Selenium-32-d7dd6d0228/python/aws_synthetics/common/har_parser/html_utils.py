@@ -417,10 +417,26 @@ _har_cloudfront_dns_by_region = {
 }
 
 
-def get_html_template(har_contents, region):
+def _get_html_template_parts(region):
     dns = _har_cloudfront_dns_by_region.get(region, _har_cloudfront_dns_by_region.setdefault("us-east-1"))
-    har_html_template = "<body><script>var harOutput = " + har_contents + "</script>" \
-                        + "<script>" + _har_header_script + "</script>" \
-                        + "<script>" + _har_css_override_script + "</script></body>" \
-                        + "<script src=\"https://" + dns + "/scripts/harInjector.js\"></script>"
-    return har_html_template
+    head = "<body><script>var harOutput = "
+    tail = "</script>" \
+           + "<script>" + _har_header_script + "</script>" \
+           + "<script>" + _har_css_override_script + "</script></body>" \
+           + "<script src=\"https://" + dns + "/scripts/harInjector.js\"></script>"
+    return head, tail
+
+
+def get_html_template(har_contents, region):
+    head, tail = _get_html_template_parts(region)
+    return head + har_contents + tail
+
+
+def write_html_template(file, write_har_contents, region):
+    """
+        Write the HTML report to file in pieces, write_har_contents(file) writes the HAR JSON in between
+    """
+    head, tail = _get_html_template_parts(region)
+    file.write(head)
+    write_har_contents(file)
+    file.write(tail)
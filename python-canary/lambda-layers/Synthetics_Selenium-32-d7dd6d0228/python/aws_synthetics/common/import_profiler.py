@@ -0,0 +1,143 @@
+import sys
+import threading
+import time
+from .constants import IMPORT_PROFILE_SUMMARY_SIZE
+
+
+class _ImportRecord:
+    __slots__ = ("name", "depth", "self_time", "cumulative_time")
+
+    def __init__(self, name, depth, self_time, cumulative_time):
+        self.name = name
+        self.depth = depth
+        self.self_time = self_time
+        self.cumulative_time = cumulative_time
+
+
+class _TimedLoader:
+    """
+        Loader wrapper timing the execution of one module, everything else is delegated to the wrapped loader
+    """
+
+    def __init__(self, profiler, loader, name, find_time):
+        self._profiler = profiler
+        self._loader = loader
+        self._name = name
+        # time spent finding and creating the module, extension modules are initialized on creation
+        self._setup_time = find_time
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        start = time.perf_counter()
+        try:
+            return self._loader.create_module(spec)
+        finally:
+            self._setup_time += time.perf_counter() - start
+
+    def exec_module(self, module):
+        stack = self._profiler._get_stack()
+        # [children cumulative time]
+        frame = [0.0]
+        stack.append(frame)
+        start = time.perf_counter()
+        try:
+            # the module sees its real loader
+            module.__loader__ = self._loader
+            if module.__spec__ is not None:
+                module.__spec__.loader = self._loader
+            self._loader.exec_module(module)
+        finally:
+            cumulative_time = time.perf_counter() - start + self._setup_time
+            stack.pop()
+            if stack:
+                stack[-1][0] += cumulative_time
+            self._profiler._add_record(_ImportRecord(self._name, len(stack), cumulative_time - frame[0],
+                                                     cumulative_time))
+
+
+class ImportProfiler:
+    """
+        Records the time spent importing each module while it is started, like python -X importtime but in
+        process. Only modules that are not imported yet are recorded, the cumulative time of a module includes
+        the modules it imports.
+    """
+
+    def __init__(self):
+        self._records = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def start(self):
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    def stop(self):
+        try:
+            sys.meta_path.remove(self)
+        except ValueError:
+            pass
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def find_spec(self, name, path=None, target=None):
+        start = time.perf_counter()
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(self, spec.loader, name, time.perf_counter() - start)
+                return spec
+        return None
+
+    def get_records(self):
+        """
+            Imported modules in the order their import finished
+        """
+        with self._lock:
+            return list(self._records)
+
+    def get_total_time(self):
+        """
+            Seconds spent in top level imports
+        """
+        return sum(record.cumulative_time for record in self.get_records() if record.depth == 0)
+
+    def get_summary(self, max_modules=IMPORT_PROFILE_SUMMARY_SIZE):
+        records = self.get_records()
+        slowest = sorted(records, key=lambda record: record.cumulative_time, reverse=True)[:max_modules]
+        return {
+            "totalTimeInMs": round(self.get_total_time() * 1000, 3),
+            "moduleCount": len(records),
+            "slowestImports": [{"module": record.name,
+                                "cumulativeTimeInMs": round(record.cumulative_time * 1000, 3)} for record in slowest]
+        }
+
+    def write(self, file):
+        """
+            Write the records in the format of python -X importtime, nested imports are listed before and indented
+            deeper than the module importing them
+        """
+        file.write("import time: self [us] | cumulative | imported package\n")
+        for record in self.get_records():
+            file.write("import time: %9d | %10d | %s%s\n" % (record.self_time * 1000000,
+                                                              record.cumulative_time * 1000000,
+                                                              "  " * record.depth, record.name))
+
+    def _get_stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _add_record(self, record):
+        with self._lock:
+            self._records.append(record)
@@ -7,6 +7,7 @@ class SyntheticsConfigurationKey(enum.Enum):
     SCREENSHOT_ON_STEP_START =  "screenshot_on_step_start"
     SCREENSHOT_ON_STEP_SUCCESS = "screenshot_on_step_success"
     SCREENSHOT_ON_STEP_FAILURE = "screenshot_on_step_failure"
+    SCREENSHOT_DEDUPLICATION = "screenshot_deduplication"
 
     INCLUDE_REQUEST_HEADERS = "include_request_headers"
     INCLUDE_RESPONSE_HEADERS = "include_response_headers"
@@ -15,6 +16,12 @@ class SyntheticsConfigurationKey(enum.Enum):
     INCLUDE_RESPONSE_BODY = "include_response_body"
 
     CONTINUE_ON_STEP_FAILURE = "continue_on_step_failure"
+    PERFORMANCE_LOG_DRAIN_INTERVAL = "performance_log_drain_interval"
+    NETWORK_CAPTURE_BACKEND = "network_capture_backend"
+    ARTIFACT_COMPRESSION = "artifact_compression"
+    UPLOAD_CONCURRENCY = "upload_concurrency"
+    ARTIFACT_BUNDLING = "artifact_bundling"
+    BROWSER_REUSE = "browser_reuse"
 
     STEP_SUCCESS_METRIC = "step_success_metric"
     STEP_DURATION_METRIC = "step_duration_metric"
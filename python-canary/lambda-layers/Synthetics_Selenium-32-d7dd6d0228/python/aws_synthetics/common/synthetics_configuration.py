@@ -8,6 +8,8 @@ class SyntheticsConfiguration:
             ConfigKey.SCREENSHOT_ON_STEP_START.value: True,
             ConfigKey.SCREENSHOT_ON_STEP_SUCCESS.value: True,
             ConfigKey.SCREENSHOT_ON_STEP_FAILURE.value: True,
+            # Store screenshots identical to an earlier one as a reference to it instead of a new object
+            ConfigKey.SCREENSHOT_DEDUPLICATION.value: False,
 
             # Canary reporting configuration
             ConfigKey.INCLUDE_REQUEST_HEADERS.value: False,
@@ -18,6 +20,18 @@ class SyntheticsConfiguration:
 
             # Canary execution configuration
             ConfigKey.CONTINUE_ON_STEP_FAILURE.value: False,
+            # Seconds between background performance log drains, None drains only at step boundaries
+            ConfigKey.PERFORMANCE_LOG_DRAIN_INTERVAL.value: None,
+            # Source of page and network events for the HAR file, "performance_log" or "cdp"
+            ConfigKey.NETWORK_CAPTURE_BACKEND.value: "performance_log",
+            # Content encoding used to upload each artifact type, e.g. {"har": "gzip", "log": "br"}
+            ConfigKey.ARTIFACT_COMPRESSION.value: {},
+            # Number of artifacts uploaded to S3 at the same time
+            ConfigKey.UPLOAD_CONCURRENCY.value: 8,
+            # Upload the artifacts of a run as one compressed tar instead of one object each
+            ConfigKey.ARTIFACT_BUNDLING.value: False,
+            # Keep the browser open at the end of the run and reuse it in the next warm invocation
+            ConfigKey.BROWSER_REUSE.value: False,
 
             # Step metric configuration
             ConfigKey.STEP_SUCCESS_METRIC.value: True,
@@ -77,6 +91,13 @@ class SyntheticsConfiguration:
     def get_screenshot_on_step_failure(self):
         return self.config[ConfigKey.SCREENSHOT_ON_STEP_FAILURE.value]
 
+    def with_screenshot_deduplication(self, value):
+        self.config[ConfigKey.SCREENSHOT_DEDUPLICATION.value] = value
+        return self
+
+    def get_screenshot_deduplication(self):
+        return self.config[ConfigKey.SCREENSHOT_DEDUPLICATION.value]
+
     def enable_step_screenshots(self):
         self.config[ConfigKey.SCREENSHOT_ON_STEP_START.value] = True
         self.config[ConfigKey.SCREENSHOT_ON_STEP_SUCCESS.value] = True
@@ -141,6 +162,48 @@ class SyntheticsConfiguration:
     def get_continue_on_step_failure(self):
         return self.config[ConfigKey.CONTINUE_ON_STEP_FAILURE.value]
 
+    def with_performance_log_drain_interval(self, value):
+        self.config[ConfigKey.PERFORMANCE_LOG_DRAIN_INTERVAL.value] = value
+        return self
+
+    def get_performance_log_drain_interval(self):
+        return self.config[ConfigKey.PERFORMANCE_LOG_DRAIN_INTERVAL.value]
+
+    def with_network_capture_backend(self, value):
+        self.config[ConfigKey.NETWORK_CAPTURE_BACKEND.value] = value
+        return self
+
+    def get_network_capture_backend(self):
+        return self.config[ConfigKey.NETWORK_CAPTURE_BACKEND.value]
+
+    def with_artifact_compression(self, value):
+        self.config[ConfigKey.ARTIFACT_COMPRESSION.value] = value
+        return self
+
+    def get_artifact_compression(self):
+        return self.config[ConfigKey.ARTIFACT_COMPRESSION.value]
+
+    def with_upload_concurrency(self, value):
+        self.config[ConfigKey.UPLOAD_CONCURRENCY.value] = value
+        return self
+
+    def get_upload_concurrency(self):
+        return self.config[ConfigKey.UPLOAD_CONCURRENCY.value]
+
+    def with_artifact_bundling(self, value):
+        self.config[ConfigKey.ARTIFACT_BUNDLING.value] = value
+        return self
+
+    def get_artifact_bundling(self):
+        return self.config[ConfigKey.ARTIFACT_BUNDLING.value]
+
+    def with_browser_reuse(self, value):
+        self.config[ConfigKey.BROWSER_REUSE.value] = value
+        return self
+
+    def get_browser_reuse(self):
+        return self.config[ConfigKey.BROWSER_REUSE.value]
+
     def with_step_success_metric(self, value):
         self.config[ConfigKey.STEP_SUCCESS_METRIC.value] = value
         return self
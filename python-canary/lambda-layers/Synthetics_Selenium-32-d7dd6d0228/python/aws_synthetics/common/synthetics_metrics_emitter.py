@@ -1,9 +1,9 @@
 import datetime
-import boto3
 from .synthetics_logger import synthetics_logger as logger
 from .constants import *
 from ..reports.requests_result import RequestsResult
 from .synthetics_configuration import SyntheticsConfiguration
+from .utils import create_boto3_client
 
 class SyntheticsMetricsEmitter:
     """
@@ -11,15 +11,27 @@ class SyntheticsMetricsEmitter:
     """
     def __init__(self):
         self._namespace = CLOUDWATCH_NAMESPACE
-        self._cloudwatch_client = boto3.client(
-            "cloudwatch",
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-            aws_session_token=os.getenv("AWS_SESSION_TOKEN"),
-            region_name=os.getenv("AWS_REGION", "us-east-1")
-        )
+        # created on first use, importing boto3 and creating a client is slow
+        self._cloudwatch_client = None
         self._synthetics_configuration = SyntheticsConfiguration()
 
+    def _get_cloudwatch_client(self):
+        if self._cloudwatch_client is None:
+            self._cloudwatch_client = create_boto3_client(
+                "cloudwatch",
+                aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+                aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+                aws_session_token=os.getenv("AWS_SESSION_TOKEN"),
+                region_name=os.getenv("AWS_REGION", "us-east-1")
+            )
+        return self._cloudwatch_client
+
+    def prepare_client(self):
+        """
+            Create the CloudWatch client ahead of the first metric publication
+        """
+        self._get_cloudwatch_client()
+
     def set_namespace(self, namespace):
          """
             Set namespace for CloudWatch metric
@@ -92,7 +104,7 @@ class SyntheticsMetricsEmitter:
             end = start + PUT_METRIC_LIMIT
             # publish metrics in batches of PUT_METRIC_LIMIT
             while len(metric_data[start:end]) > 0:
-                self._cloudwatch_client.put_metric_data(Namespace=self._namespace, MetricData=metric_data[start:end])
+                self._get_cloudwatch_client().put_metric_data(Namespace=self._namespace, MetricData=metric_data[start:end])
                 # slide window
                 start = start + PUT_METRIC_LIMIT
                 end = start + PUT_METRIC_LIMIT
@@ -1,7 +1,11 @@
 import json
+import shutil
+import threading
 import traceback
 from .constants import LIBRARY_VERSION
 
+_boto3_client_lock = threading.Lock()
+
 
 class ComplexEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -11,6 +15,27 @@ class ComplexEncoder(json.JSONEncoder):
             return json.JSONEncoder.default(self, obj)
 
 
+def get_disk_usage(path="/tmp"):
+    """
+        Returns the used and total size of the file system of path, without running du in a shell
+    """
+    try:
+        usage = shutil.disk_usage(path)
+        return "%.1f MB used of %.1f MB" % (usage.used / (1024 * 1024), usage.total / (1024 * 1024))
+    except OSError as ex:
+        return "unknown (%s)" % ex
+
+
+def create_boto3_client(service_name, **kwargs):
+    """
+        Create a boto3 client. The default boto3 session is not thread safe, clients created from different threads
+        are created one at a time.
+    """
+    import boto3
+    with _boto3_client_lock:
+        return boto3.client(service_name, **kwargs)
+
+
 def stringify_exception(exception):
     # appsec: limit to 2 levels of stack trace to not expose attack surface areas
     return "".join(traceback.format_exception(exception.__class__, exception, exception.__traceback__, limit=2))
@@ -0,0 +1,39 @@
+import gzip
+import shutil
+from ..common.constants import *
+
+
+def get_artifact_type(file_name):
+    """
+        Returns the type of a text artifact that can be compressed, None for any other file
+    """
+    if file_name.endswith(HAR_FILE_NAME):
+        return ARTIFACT_TYPE_HAR
+    if file_name.endswith("log.txt"):
+        return ARTIFACT_TYPE_LOG
+    # only the reports the runtime writes, other JSON files in the artifacts folder belong to the canary
+    if file_name.startswith(SYNTHETICS_REPORT_NAME + "-") and file_name.endswith(".json"):
+        return ARTIFACT_TYPE_REPORT
+    if file_name == BROKEN_LINK_CHECKER_REPORT_FILE_NAME:
+        return ARTIFACT_TYPE_REPORT
+    return None
+
+
+def compress_artifact(source, target, content_encoding):
+    """
+        Compress the source file object into the target file object chunk by chunk, to be uploaded with the
+        given Content-Encoding
+    """
+    if content_encoding == CONTENT_ENCODING_GZIP:
+        # fixed mtime, so the same contents always compress the same
+        with gzip.GzipFile(fileobj=target, mode="wb", compresslevel=GZIP_COMPRESSION_LEVEL, mtime=0) as compressor:
+            shutil.copyfileobj(source, compressor, ARTIFACT_COMPRESSION_CHUNK_SIZE)
+        return
+    if content_encoding == CONTENT_ENCODING_BROTLI:
+        import brotli
+        compressor = brotli.Compressor(mode=brotli.MODE_TEXT, quality=BROTLI_COMPRESSION_QUALITY)
+        for chunk in iter(lambda: source.read(ARTIFACT_COMPRESSION_CHUNK_SIZE), b""):
+            target.write(compressor.process(chunk))
+        target.write(compressor.finish())
+        return
+    raise ValueError("Unsupported content encoding: %s" % content_encoding)
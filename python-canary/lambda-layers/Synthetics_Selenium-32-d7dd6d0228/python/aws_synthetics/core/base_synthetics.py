@@ -1,13 +1,16 @@
+import asyncio
 import json
 import inspect
-import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from abc import ABCMeta, abstractmethod
 from ..common import ExecutionStatus, HarParser, RequestResponseLogHelper, SyntheticsMetricsEmitter, \
     synthetics_logger as logger, synthetics_configuration, CanaryStatus
-from ..reports import SyntheticsReport, RequestsResult, CanaryStepResult
+from ..reports import SyntheticsReport, RequestsResult, CanaryStepResult, RuntimePhases
 from ..common.constants import *
-from ..common.utils import stringify_exception
+from ..common.utils import stringify_exception, get_disk_usage
 
 
 def _cleanup_chromium_files(path="/tmp"):
@@ -24,6 +27,13 @@ def _cleanup_chromium_files(path="/tmp"):
                 logger.warning("This may cause lambda to run out of space.")
 
 
+def _run_coroutine(coroutine_function):
+    """
+        Run a coroutine function to completion in a thread without an event loop
+    """
+    return asyncio.run(coroutine_function())
+
+
 def _create_canary_arn(aws_partition, region, aws_account_id, canary_name, canary_id):
     """
         Returns canary ARN string
@@ -44,6 +54,8 @@ class BaseSynthetics(metaclass=ABCMeta):
         self._artifact_location = None
         self._execution_result = ExecutionStatus.NO_RESULT.value
         self._execution_error = None
+        # teardown steps running in parallel can add execution errors at the same time
+        self._execution_error_lock = threading.Lock()
         self._har = HarParser()
         self._har_region = None
         self._page = None
@@ -55,6 +67,9 @@ class BaseSynthetics(metaclass=ABCMeta):
         self._screenshot = None
         self._metrics_emitter = SyntheticsMetricsEmitter()
         self._synthetics_report = SyntheticsReport()
+        self._runtime_phases = RuntimePhases()
+        # wall time of the bootstrap, time saved by running its tasks at the same time and time of each task
+        self._bootstrap_result = None
         self._request_result = RequestsResult()
         self._uploader = None
         self._is_ui_canary = False
@@ -175,7 +190,11 @@ class BaseSynthetics(metaclass=ABCMeta):
 
             self._canary_run_start_time = datetime.fromtimestamp(event.get("canaryRunStartTime", datetime.now().timestamp() * 1000) / 1000)
 
-            self._uploader.set_canary_details(self._canary_name, self._artifact_s3_location, self._invocation_time)
+            self._uploader.set_canary_details(self._canary_name, self._artifact_s3_location, self._invocation_time,
+                                              aws_account_id)
+            # uploads must not start once the Lambda is about to time out
+            self._uploader.set_upload_deadline(
+                time.monotonic() + context.get_remaining_time_in_millis() / 1000 - S3_UPLOAD_DEADLINE_MARGIN)
             self._screenshot.set_uploader(self._uploader)
 
             logger.info("Recording configurations:")
@@ -192,17 +211,62 @@ class BaseSynthetics(metaclass=ABCMeta):
         except Exception as ex:
             self.add_execution_error("Error while setting event and context for SyntheticsPuppeteer", ex)
 
+    async def bootstrap(self):
+        """
+            Set up the S3 client and the CloudWatch client and launch the browser of the run at the same time,
+            before the customer canary starts. Failed tasks are logged and done again when they are first needed.
+        """
+        tasks = {
+            "browserPrelaunch": self.prelaunch_browser,
+            "s3Setup": self._uploader.prepare_s3_client,
+            "cloudWatchSetup": self._metrics_emitter.prepare_client
+        }
+        durations = {}
+
+        def run(name, task):
+            start = time.perf_counter()
+            try:
+                task()
+            except Exception:
+                logger.exception("Unable to prepare %s before the canary" % name)
+            finally:
+                duration = time.perf_counter() - start
+                self._runtime_phases.add(name, duration)
+                durations[name] = duration * 1000
+
+        start = time.perf_counter()
+        loop = asyncio.get_event_loop()
+        with ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix="SyntheticsBootstrap") as executor:
+            await asyncio.gather(*[loop.run_in_executor(executor, run, name, task) for name, task in tasks.items()])
+        elapsed = (time.perf_counter() - start) * 1000
+        saved = max(0, sum(durations.values()) - elapsed)
+        self._bootstrap_result = {
+            "timeInMs": round(elapsed, 3),
+            "timeSavedInMs": round(saved, 3),
+            "tasksInMs": {name: round(duration, 3) for name, duration in durations.items()}
+        }
+        logger.info("Bootstrap took %.0f ms, %.0f ms saved by overlapping %s" % (
+            elapsed, saved, ", ".join("%s (%.0f ms)" % (name, duration) for name, duration in durations.items())))
+        return durations
+
+    def prelaunch_browser(self):
+        """
+            Launch the browser ahead of the customer canary, subclasses driving a browser override it
+        """
+        pass
+
     def add_execution_error(self, err_msg, exception=None):
         """
             Handle errors during canary execution
         """
-        self._execution_result = ExecutionStatus.FAIL_RESULT.value
         execution_error_str = "{} \n Exception: {}".format(err_msg, str(exception))
         logger.error(execution_error_str)
-        if self._execution_error is not None:
-            self._execution_error = self._execution_error + " Additional execution exception: " + execution_error_str
-            return
-        self._execution_error = execution_error_str
+        with self._execution_error_lock:
+            self._execution_result = ExecutionStatus.FAIL_RESULT.value
+            if self._execution_error is not None:
+                self._execution_error = self._execution_error + " Additional execution exception: " + execution_error_str
+                return
+            self._execution_error = execution_error_str
 
     async def start_step(self, step_name, step_configuration):
         """
@@ -247,9 +311,11 @@ class BaseSynthetics(metaclass=ABCMeta):
             step_name = "Step" + str(self._step_count)
 
         step_configuration = synthetics_configuration.create_step_configuration(step_config)
+        step_phases = self._runtime_phases.add_step(step_name)
 
         try:
-            await self.start_step(step_name, step_configuration)
+            with self._runtime_phases.measure("screenshots", step_phases):
+                await self.start_step(step_name, step_configuration)
             start_time = datetime.now()
             if inspect.iscoroutinefunction(function_to_execute):
                 return_value = await function_to_execute()
@@ -263,15 +329,18 @@ class BaseSynthetics(metaclass=ABCMeta):
                 .with_end_time(end_time) \
                 .with_source_url(source_url) \
                 .with_step_status(CanaryStatus.PASSED.value)
-            await self.succeed_step(step_name, step_configuration)
-            self._publish_step_result(CanaryStatus.PASSED.value, start_time, end_time, canary_step_result, step_name, step_configuration)
+            with self._runtime_phases.measure("screenshots", step_phases):
+                await self.succeed_step(step_name, step_configuration)
+            with self._runtime_phases.measure("metrics", step_phases):
+                self._publish_step_result(CanaryStatus.PASSED.value, start_time, end_time, canary_step_result, step_name, step_configuration)
             return return_value
         except Exception as ex:
             logger.error("Exception encountered executing execute_step in step name: %s" % step_name)
             end_time = datetime.now()
             source_url = self.get_url()
             step_error = stringify_exception(ex)
-            await self.fail_step(step_name, step_error, step_configuration)
+            with self._runtime_phases.measure("screenshots", step_phases):
+                await self.fail_step(step_name, step_error, step_configuration)
             canary_step_result.with_step_num(self._step_count) \
                 .with_step_name(step_name) \
                 .with_start_time(start_time) \
@@ -279,13 +348,17 @@ class BaseSynthetics(metaclass=ABCMeta):
                 .with_source_url(source_url) \
                 .with_step_status(CanaryStatus.FAILED.value) \
                 .with_failure_reason(step_error)
-            self._publish_step_result(CanaryStatus.FAILED.value, start_time, end_time, canary_step_result, step_name, step_configuration)
+            with self._runtime_phases.measure("metrics", step_phases):
+                self._publish_step_result(CanaryStatus.FAILED.value, start_time, end_time, canary_step_result, step_name, step_configuration)
 
             step_error = step_error + ' for step: ' + step_name
             self._step_errors.append(step_error)
             if not step_configuration.get_continue_on_step_failure():
                 self._stopped_at_step_failure = True
                 raise
+        finally:
+            with self._runtime_phases.measure("harEvents", step_phases):
+                await self.collect_har_events()
 
     def _publish_result(self, result, start_time, end_time, step_name=None, step_configuration=None):
         """
@@ -337,9 +410,11 @@ class BaseSynthetics(metaclass=ABCMeta):
                 .with_time_spent_in_reset(reset_time) \
                 .with_time_spent_in_launch(launch_time) \
                 .with_time_spent_in_setup(setup_time) \
+                .with_bootstrap(self._bootstrap_result) \
                 .with_execution_status(self._execution_result) \
                 .with_execution_error(self._execution_error) \
-                .with_configuration(self.get_configuration())
+                .with_configuration(self.get_configuration()) \
+                .with_runtime_phases(self._runtime_phases)
 
             file = open(os.path.join(self._temp_artifacts_path, SYNTHETICS_REPORT_NAME + "-" + canary_status + ".json"),
                         "w")
@@ -383,19 +458,43 @@ class BaseSynthetics(metaclass=ABCMeta):
             else:
                 canary_error_msg = self._step_errors[0]
 
-        await self.generate_har_file()
-
-        metrics_published = self._publish_result(canary_result, start_time, end_time)
-        self._create_execution_report(canary_result, canary_error_msg, metrics_published, start_time, end_time,
-                                      reset_time, setup_time, launch_time)
-        await self.upload_artifacts(self._temp_artifacts_path)
-        if self._artifact_upload_error is not None:
-            self.add_execution_error("Unable to upload artifacts to S3", self._artifact_upload_error)
-        self._artifact_location = self._uploader.get_s3_path() if self._uploader.has_uploaded_artifacts() else None
+        # Teardown steps run as soon as what they depend on is done: the HAR needs the browser, so the browser is
+        # released once the HAR is generated. Request metrics are counted while the HAR is generated and are
+        # published while screenshots finish uploading and the browser closes. The report needs the metrics result
+        # and the screenshot upload errors, and is uploaded with the other artifacts.
+        for phase, duration in (("reset", reset_time), ("setup", setup_time), ("launch", launch_time)):
+            if duration is not None:
+                self._runtime_phases.add(phase, duration / 1000)
+        loop = asyncio.get_event_loop()
+        with ThreadPoolExecutor(max_workers=3, thread_name_prefix="SyntheticsTeardown") as executor:
+            screenshot_uploads = loop.run_in_executor(executor, self._measure_runtime_phase, "screenshotUploadWait",
+                                                      self._screenshot.wait_for_uploads)
+            with self._runtime_phases.measure("harGeneration"):
+                await self.generate_har_file()
+            browser_release = loop.run_in_executor(executor, self._measure_runtime_phase, "browserClose",
+                                                   _run_coroutine, self.release_browser)
+            metrics = loop.run_in_executor(executor, self._measure_runtime_phase, "metricsPublish",
+                                           self._publish_result, canary_result, start_time, end_time)
+            await screenshot_uploads
+            metrics_published = await metrics
+
+            with self._runtime_phases.measure("reportWriting"):
+                self._create_execution_report(canary_result, canary_error_msg, metrics_published, start_time,
+                                              end_time, reset_time, setup_time, launch_time)
+            with self._runtime_phases.measure("artifactUpload"):
+                await self.upload_artifacts(self._temp_artifacts_path)
+            if self._artifact_upload_error is not None:
+                self.add_execution_error("Unable to upload artifacts to S3", self._artifact_upload_error)
+            self._artifact_location = self._uploader.get_s3_path() if self._uploader.has_uploaded_artifacts() else None
+            await browser_release
         _cleanup_chromium_files(self._temp_artifacts_path)
+        bootstrap = self._bootstrap_result
+        # the report is already uploaded, the time spent writing and uploading it and closing the browser is
+        # returned with the result of this run
+        teardown_time = self._runtime_phases.get_phases_in_ms(RUNTIME_TEARDOWN_PHASES)
+        logger.info("Runtime teardown took %s" % json.dumps(teardown_time))
         logger.debug("Finished after-canary activities")
-        await self.close_browser()
-        logger.debug("/tmp size after canary execution: " + subprocess.getoutput('du -sh /tmp'))
+        logger.debug("/tmp size after canary execution: " + get_disk_usage("/tmp"))
         return {
             "state": canary_result,
             "testRunError": canary_error_msg,
@@ -407,6 +506,10 @@ class BaseSynthetics(metaclass=ABCMeta):
             "resetTime": reset_time,
             "setupTime": setup_time,
             "launchTime": launch_time,
+            # bootstrap runs in the launch phase, the time saved is the task time that overlapped
+            "bootstrapTime": bootstrap["timeInMs"] if bootstrap is not None else None,
+            "bootstrapTimeSaved": bootstrap["timeSavedInMs"] if bootstrap is not None else None,
+            "teardownTime": teardown_time,
             "customerStepsStartTime": start_time.timestamp(),
             "customerStepsEndTime": end_time.timestamp()
         }
@@ -414,17 +517,50 @@ class BaseSynthetics(metaclass=ABCMeta):
     def add_report(self, report):
         self._synthetics_report.add_report(report)
 
+    def measure_runtime_phase(self, phase):
+        """
+            Context manager adding the time spent in the with block to a runtime phase of the Synthetics report
+        """
+        return self._runtime_phases.measure(phase)
+
+    def _measure_runtime_phase(self, phase, function, *args):
+        with self._runtime_phases.measure(phase):
+            return function(*args)
+
+    def add_import_profile(self, import_profiler):
+        """
+            Write the import times recorded while loading the customer canary as a run artifact and add their summary
+            to the Synthetics report
+        """
+        try:
+            with open(os.path.join(self._temp_artifacts_path, IMPORT_PROFILE_FILE_NAME), "w") as file:
+                import_profiler.write(file)
+            summary = import_profiler.get_summary()
+            self._synthetics_report.with_import_profile(summary)
+            logger.info("Customer canary imports took %s ms" % summary["totalTimeInMs"])
+        except Exception:
+            logger.exception("Unable to write import profile")
+
     def get_screenshot_result(self, step_name):
         """
             Get screenshot for given step
         """
         return self._screenshot.get_screenshot_result(step_name)
 
+    async def release_browser(self):
+        """
+            Release the browser at the end of the canary run. Subclasses can keep it for the next run instead
+            of closing it
+        """
+        await self.close_browser()
+
     async def reset(self):
         """
             Reset SyntheticsPuppeteer instance fields with default values
         """
         logger.debug("Reset Synthetics")
+        self._runtime_phases.reset()
+        self._bootstrap_result = None
         await self.close_browser()
 
         self._screenshot.reset()
@@ -458,6 +594,12 @@ class BaseSynthetics(metaclass=ABCMeta):
         """
         return synthetics_configuration
 
+    async def collect_har_events(self):
+        """
+            Process page and network events recorded so far. Called at step boundaries
+        """
+        pass
+
     def _get_requests_result(self):
         if self._is_ui_canary:
             return self._request_result
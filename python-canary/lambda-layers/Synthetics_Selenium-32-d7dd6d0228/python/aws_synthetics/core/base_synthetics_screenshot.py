@@ -1,6 +1,10 @@
+import os
 from abc import ABCMeta, abstractmethod
 from ..common import synthetics_logger as logger
+from ..common import synthetics_configuration
+from ..common.constants import *
 from ..reports.screenshot_result import ScreenshotResult
+from .screenshot_upload_queue import ScreenshotUploadQueue
 
 
 class BaseSyntheticsScreenshot(metaclass=ABCMeta):
@@ -17,6 +21,12 @@ class BaseSyntheticsScreenshot(metaclass=ABCMeta):
         self._current_step_screenshots = []
         self._zero_fill = 2
         self._uploader = uploader
+        self._upload_queue = ScreenshotUploadQueue()
+        # content hashes of the screenshots stored by this run and of the screenshots uploaded by earlier runs
+        # of this warm container, mapped to the screenshot they were stored as
+        self._run_content_index = {}
+        self._container_content_index = {}
+        self._pending_content_index = []
         if zero_fill >= 2:
             self._zero_fill = zero_fill
 
@@ -32,13 +42,52 @@ class BaseSyntheticsScreenshot(metaclass=ABCMeta):
         """
         return str(num).zfill(num_len)
 
+    def wait_for_uploads(self):
+        """
+            Wait for the screenshots queued for upload, returns the number of screenshots that failed to upload
+        """
+        failed = self._upload_queue.join()
+        # uploaded screenshots can be referenced by the next runs of this container
+        for digest, screenshot_result, s3_path in self._pending_content_index:
+            if screenshot_result.get_error() is None:
+                if len(self._container_content_index) >= SCREENSHOT_CONTENT_INDEX_MAX_SIZE:
+                    del self._container_content_index[next(iter(self._container_content_index))]
+                self._container_content_index[digest] = s3_path
+        self._pending_content_index = []
+        return failed
+
+    def find_duplicate(self, digest):
+        """
+            Returns the file name of an identical screenshot of this run, or the S3 path of one uploaded by an
+            earlier run of this container, None if the screenshot content is new
+        """
+        duplicate_of = self._run_content_index.get(digest)
+        if duplicate_of is None:
+            duplicate_of = self._container_content_index.get(digest)
+        return duplicate_of
+
+    def index_screenshot(self, digest, screenshot_result):
+        """
+            Remember the content hash of a stored screenshot so identical screenshots can reference it
+        """
+        self._run_content_index[digest] = screenshot_result.get_file_name()
+        # bundled screenshots are not stored as objects of their own
+        if self._uploader is not None and not synthetics_configuration.get_artifact_bundling():
+            s3_path = self._uploader.get_s3_path()
+            if s3_path is not None:
+                self._pending_content_index.append(
+                    (digest, screenshot_result, os.path.join(s3_path, screenshot_result.get_file_name())))
+
     def reset(self):
         """
             Reset count to starting number
         """
+        # uploads still queued must not outlive the canary run they belong to
+        self.wait_for_uploads()
         self._count = self.starting_num
         self._screenshots = {}
         self._current_step_screenshots = []
+        self._run_content_index = {}
 
     def get_screenshot_result(self, step_name):
         """
@@ -68,9 +117,10 @@ class BaseSyntheticsScreenshot(metaclass=ABCMeta):
         pass
 
     @abstractmethod
-    def add_screenshot_result(self, step_name, file_name, page_url) -> ScreenshotResult:
+    def add_screenshot_result(self, step_name, file_name, page_url, duplicate_of=None) -> ScreenshotResult:
         """
             Adds screenshot result to map and
             returns file_name and page url of screenshot
+            Screenshots that duplicate an earlier one are not uploaded
         """
         pass
@@ -1,16 +1,27 @@
 import os
 import datetime
+import io
 import json
+import random
 import sys
 import asyncio
+import tarfile
+import tempfile
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 from urllib.parse import urlparse
-import boto3
-from botocore.exceptions import ClientError
 from abc import ABCMeta, abstractmethod
 from ..common.synthetics_logger import synthetics_logger as logger
+from ..common import synthetics_configuration
 from ..reports.screenshot_result import ScreenshotResult
 from ..common.constants import *
+from ..common.utils import create_boto3_client
+from .artifact_compression import get_artifact_type, compress_artifact
+from .s3_bucket_cache import s3_bucket_cache
+from .upload_manifest import UploadManifest
 
 
 class BaseSyntheticsUploader(metaclass=ABCMeta):
@@ -18,17 +29,31 @@ class BaseSyntheticsUploader(metaclass=ABCMeta):
         self.canary_name = None
         self.invocation_time = None
         self.s3_upload_location = {"bucket": "", "key": ""}
+        # account expected to own the artifact bucket
+        self.aws_account_id = None
         self.s3_client = None
         self.setup_error = None
         self.setup_done = False
+        # screenshots are uploaded from several threads, only one of them sets up the S3 client
+        self._setup_lock = threading.Lock()
         # True if at least one artifact has been uploaded to s3 upload location
         self.uploaded_artifacts = False
         self.artifacts_path = artifacts_path
+        # time.monotonic() value after which no upload is started, None for no deadline
+        self.upload_deadline = None
+        self.upload_manifest = UploadManifest(artifacts_path)
 
-    def set_canary_details(self, canary_name, artifact_s3_location, invocation_time):
+    def set_canary_details(self, canary_name, artifact_s3_location, invocation_time, aws_account_id=None):
         self.canary_name = canary_name
         self.s3_upload_location = artifact_s3_location
         self.invocation_time = invocation_time
+        self.aws_account_id = aws_account_id
+
+    def set_upload_deadline(self, upload_deadline):
+        """
+            Set the time.monotonic() value after which no upload or retry is started
+        """
+        self.upload_deadline = upload_deadline
 
     def has_uploaded_artifacts(self):
         return self.uploaded_artifacts
@@ -39,24 +64,61 @@ class BaseSyntheticsUploader(metaclass=ABCMeta):
         return os.path.join(self.s3_upload_location["bucket"], self.s3_upload_location["key"])
 
     def set_s3_client(self):
-        self.setup_done = True
         try:
             self.s3_client = self.get_s3_client()
             self._verify_bucket_ownership()
         except Exception as ex:
             self.setup_error = ex
             raise
+        finally:
+            # set last, other threads only skip the setup once the client exists or the error is known
+            self.setup_done = True
+
+    def prepare_s3_client(self):
+        """
+            Set up the S3 client ahead of the first upload. On failure the setup is cleared, so the first upload
+            sets up the client again and raises the error only if that fails too
+        """
+        if not self.s3_upload_location["bucket"]:
+            return
+        with self._setup_lock:
+            if self.setup_done:
+                return
+            try:
+                self.set_s3_client()
+            except Exception:
+                self.s3_client = None
+                self.setup_error = None
+                self.setup_done = False
+                raise
+
+    def _ensure_s3_client(self):
+        """
+            Set up the S3 client if no upload did yet, raises the setup error of this run if there was one
+        """
+        with self._setup_lock:
+            if self.setup_error is not None:
+                raise Exception(self.setup_error)
+            if not self.setup_done:
+                self.set_s3_client()
 
     def get_s3_client(self):
         if self.s3_client is not None:
             return self.s3_client
 
+        cached_s3_client = s3_bucket_cache.get_client(self.s3_upload_location["bucket"])
+        if cached_s3_client is not None:
+            logger.debug("Using cached S3 client for bucket %s" % self.s3_upload_location["bucket"])
+            self.s3_client = cached_s3_client
+            return self.s3_client
+
         try:
-            self.s3_client = boto3.client("s3",
+            self.s3_client = create_boto3_client("s3",
                                 aws_access_key_id=AWS_ACCESS_KEY_ID,
                                 aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
                                 aws_session_token=AWS_SESSION_TOKEN,
-                                region_name=AWS_REGION)
+                                region_name=AWS_REGION,
+                                config=self._get_s3_client_config())
             s3_bucket = self.s3_upload_location["bucket"]
             current_region = AWS_REGION
             bucket_region = None
@@ -77,27 +139,50 @@ class BaseSyntheticsUploader(metaclass=ABCMeta):
 
             bucket_region = bucket_region or current_region
             if bucket_region != current_region:
-                self.s3_client = boto3.client("s3",
+                self.s3_client = create_boto3_client("s3",
                                     aws_access_key_id=AWS_ACCESS_KEY_ID,
                                     aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
                                     aws_session_token=AWS_SESSION_TOKEN,
-                                    region_name=bucket_region)
+                                    region_name=bucket_region,
+                                    config=self._get_s3_client_config())
+            s3_bucket_cache.set_client(s3_bucket, self.s3_client)
             return self.s3_client
         except Exception as ex:
             logger.exception("Error getting S3 client: %s" % json.dumps(ex))
             raise ex
 
+    def _get_upload_concurrency(self):
+        """
+            Number of artifacts uploaded at the same time
+        """
+        try:
+            return max(1, int(synthetics_configuration.get_upload_concurrency() or S3_UPLOAD_CONCURRENCY))
+        except (TypeError, ValueError):
+            logger.warning("Invalid upload concurrency, using %s" % S3_UPLOAD_CONCURRENCY)
+            return S3_UPLOAD_CONCURRENCY
+
+    def _get_s3_client_config(self):
+        # one pooled connection for each part that can be in flight across the concurrent uploads
+        from botocore.config import Config
+        return Config(max_pool_connections=max(self._get_upload_concurrency() * S3_MULTIPART_CONCURRENCY, 10))
+
     def upload_screenshots(self, screenshots: List[ScreenshotResult], delete_files=True):
         """
             Upload screenshots to S3 bucket
         """
+        if synthetics_configuration.get_artifact_bundling():
+            # screenshots are packed into the artifact bundle after the canary run
+            return None
+
         upload_artifact_errors = []
         try:
             files = [os.path.join(self.artifacts_path, screenshot.get_file_name()) for screenshot in screenshots]
             logger.debug("Uploading screenshots: %s" % files)
             num_files_uploaded, file_upload_errors = self._upload_files_to_s3(files)
             if delete_files:
-                files_removed, file_remove_errors = self._delete_temp_files(files)
+                # screenshots that failed to upload were moved for the next invocation to retry
+                files_removed, file_remove_errors = self._delete_temp_files(
+                    [file for file in files if os.path.exists(file)])
             else:
                 files_removed, file_remove_errors = ([], [])
             upload_artifact_errors = file_upload_errors + file_remove_errors
@@ -132,9 +217,14 @@ class BaseSyntheticsUploader(metaclass=ABCMeta):
         # upload files
         try:
             logger.info("Uploading files to S3: %s" % json.dumps(files))
-            num_files_uploaded, file_upload_errors = self._upload_files_to_s3(files)
+            if synthetics_configuration.get_artifact_bundling():
+                num_files_uploaded, file_upload_errors = self._upload_bundle_to_s3(files)
+            else:
+                num_files_uploaded, file_upload_errors = self._upload_files_to_s3(files)
             if num_files_uploaded > 0:
                 self.uploaded_artifacts = True  # At least one artifact uploaded.
+            self._retry_pending_uploads()
+            logger.info("Upload manifest: %s" % json.dumps(self.upload_manifest.to_dict()))
             if len(file_upload_errors) > 0:
                 upload_artifact_errors = file_upload_errors
                 logger.error(str(upload_artifact_errors))
@@ -144,7 +234,9 @@ class BaseSyntheticsUploader(metaclass=ABCMeta):
         finally:
             # delete temp files
             if delete_files or delete_files is None:
-                files_removed, file_remove_errors = self._delete_temp_files(files)
+                # artifacts that failed to upload were moved for the next invocation to retry
+                files_removed, file_remove_errors = self._delete_temp_files(
+                    [file for file in files if os.path.exists(file)])
                 if len(file_remove_errors) > 0:
                     upload_artifact_errors = upload_artifact_errors + file_remove_errors
 
@@ -173,9 +265,15 @@ class BaseSyntheticsUploader(metaclass=ABCMeta):
         # upload files
         try:
             logger.info("Uploading files to S3: %s" % json.dumps(files))
-            num_files_uploaded, file_upload_errors = await self._upload_files_to_s3_async(files)
+            if synthetics_configuration.get_artifact_bundling():
+                num_files_uploaded, file_upload_errors = await asyncio.get_event_loop().run_in_executor(
+                    None, self._upload_bundle_to_s3, files)
+            else:
+                num_files_uploaded, file_upload_errors = await self._upload_files_to_s3_async(files)
             if num_files_uploaded > 0:
                 self.uploaded_artifacts = True  # At least one artifact uploaded.
+            await asyncio.get_event_loop().run_in_executor(None, self._retry_pending_uploads)
+            logger.info("Upload manifest: %s" % json.dumps(self.upload_manifest.to_dict()))
             if len(file_upload_errors) > 0:
                 upload_artifact_errors = file_upload_errors
                 logger.error(str(upload_artifact_errors))
@@ -185,7 +283,9 @@ class BaseSyntheticsUploader(metaclass=ABCMeta):
         finally:
             # delete temp files
             if delete_files or delete_files is None:
-                files_removed, file_remove_errors = self._delete_temp_files(files)
+                # artifacts that failed to upload were moved for the next invocation to retry
+                files_removed, file_remove_errors = self._delete_temp_files(
+                    [file for file in files if os.path.exists(file)])
                 if len(file_remove_errors) > 0:
                     upload_artifact_errors = upload_artifact_errors + file_remove_errors
 
@@ -198,31 +298,57 @@ class BaseSyntheticsUploader(metaclass=ABCMeta):
         self.canary_name = None
         self.invocation_time = None
         self.s3_upload_location = {"bucket": "", "key": ""}
+        self.aws_account_id = None
         self.s3_client = None
         self.setup_error = None
         self.setup_done = False
         self.uploaded_artifacts = False
+        self.upload_deadline = None
+        self.upload_manifest.reset()
 
     def _verify_bucket_ownership(self):
         """
             Verify ownership of the S3 bucket
         """
+        from botocore.exceptions import ClientError
         bucket = self.s3_upload_location["bucket"]
+        if s3_bucket_cache.is_owned(bucket):
+            logger.debug("Bucket ownership for %s was verified by a previous invocation" % bucket)
+            return
+
         logger.debug("Verifying bucket ownership for %s" % bucket)
-        found = False
-        try:
-            response = self.s3_client.list_buckets()
-            for bkt in response["Buckets"]:
-                if bkt["Name"] == bucket:
-                    found = True
-                    break
-            logger.debug("Verified bucket ownership for %s" % bucket)
-        except ClientError:
-            logger.exception(
-                "Exception calling ListBuckets. Unable to determine the bucket ownership for bucket: %s" % bucket)
-            raise
+        found = self._head_bucket_with_expected_owner(bucket)
+        if not found:
+            try:
+                response = self.s3_client.list_buckets()
+                for bkt in response["Buckets"]:
+                    if bkt["Name"] == bucket:
+                        found = True
+                        break
+                logger.debug("Verified bucket ownership for %s" % bucket)
+            except ClientError:
+                logger.exception(
+                    "Exception calling ListBuckets. Unable to determine the bucket ownership for bucket: %s" % bucket)
+                raise
         if not found:
             raise RuntimeError("S3 bucket {} is not owned by this AWS account".format(bucket))
+        s3_bucket_cache.set_owned(bucket)
+
+    def _head_bucket_with_expected_owner(self, bucket):
+        """
+            Verify ownership of the S3 bucket with a single HeadBucket call instead of listing all buckets.
+            Returns False if it can not be verified this way, e.g. if the role is not allowed s3:ListBucket
+        """
+        if not self.aws_account_id:
+            return False
+        from botocore.exceptions import ClientError
+        try:
+            self.s3_client.head_bucket(Bucket=bucket, ExpectedBucketOwner=self.aws_account_id)
+            logger.debug("Verified bucket ownership for %s with HeadBucket" % bucket)
+            return True
+        except ClientError as ex:
+            logger.debug("Unable to verify bucket ownership for %s with HeadBucket: %s" % (bucket, ex))
+            return False
 
     def _read_temp_dir(self):
         """
@@ -237,82 +363,275 @@ class BaseSyntheticsUploader(metaclass=ABCMeta):
             logger.exception("Error getting list of files from /tmp.")
             raise
 
-    def _upload_file(self, file: str):
-        bucket = self.s3_upload_location["bucket"]
-        key = self.s3_upload_location["key"]
+    def _upload_file(self, file: str, bucket=None, key=None, file_name=None, s3_client=None):
+        """
+            Upload the file to the S3 upload location of the run, or to the given bucket, key and file name with
+            the given client for the region of the bucket
+        """
+        bucket = bucket or self.s3_upload_location["bucket"]
+        s3_client = s3_client or self.s3_client
+        key = key if key is not None else self.s3_upload_location["key"]
+        file_name = file_name or os.path.basename(file)
+        compressed_file = None
         try:
-            with open(file, "rb") as f:
-                file_contents = f.read()
-                file_s3_path = os.path.join(bucket, key, os.path.basename(f.name))
-                params = {}
-                if file.endswith(".html") or file.endswith("txt"):
-                    params["ContentType"] = "text/html; charset=UTF-8"
-
-                response = self.s3_client.put_object(
-                    Bucket=bucket,
-                    Key=os.path.join(key, os.path.basename(f.name)),
-                    Body=file_contents,
-                    ServerSideEncryption=SSE_KMS,
-                    ContentType=params.get("ContentType", "")
-                )
-                logger.debug("Finished uploading file at %s" % file_s3_path)
-                logger.debug(json.dumps(response))
-                return {"upload_successful": True}
+            file_s3_path = os.path.join(bucket, key, file_name)
+            params = {}
+            if file.endswith(".html") or file.endswith("txt"):
+                params["ContentType"] = "text/html; charset=UTF-8"
+            extra_args = {
+                "ServerSideEncryption": SSE_KMS,
+                "ContentType": params.get("ContentType", "")
+            }
+
+            # the body is streamed from disk, artifacts above the multipart threshold are uploaded in parts
+            compressed_file, content_encoding = self._compress_file(file)
+            if compressed_file is not None:
+                extra_args["ContentEncoding"] = content_encoding
+
+            def upload():
+                if compressed_file is not None:
+                    compressed_file.seek(0)
+                    s3_client.upload_fileobj(compressed_file, bucket, os.path.join(key, file_name),
+                                             ExtraArgs=extra_args, Config=self._get_transfer_config())
+                else:
+                    s3_client.upload_file(file, bucket, os.path.join(key, file_name),
+                                          ExtraArgs=extra_args, Config=self._get_transfer_config())
+
+            self._call_with_retries(file_s3_path, upload)
+            logger.debug("Finished uploading file at %s" % file_s3_path)
+            return {"upload_successful": True, "s3_path": file_s3_path}
         except Exception as ex:
             logger.exception("Failed to upload file %s" % file)
             return {"upload_successful": False, "error": ex}
+        finally:
+            if compressed_file is not None:
+                compressed_file.close()
 
-    async def _upload_file_async(self, file):
-        return self._upload_file(file)
+    def _call_with_retries(self, s3_path, upload):
+        """
+            Run upload until it succeeds, with exponential backoff and full jitter between the attempts. Gives up
+            after S3_UPLOAD_MAX_ATTEMPTS attempts or if the next attempt would start after the upload deadline
+        """
+        attempt = 1
+        while True:
+            if not self._has_upload_time_left():
+                raise TimeoutError("Upload deadline reached before uploading %s" % s3_path)
+            try:
+                return upload()
+            except Exception as ex:
+                delay = random.uniform(0, min(S3_UPLOAD_RETRY_MAX_DELAY, S3_UPLOAD_RETRY_BASE_DELAY * 2 ** (attempt - 1)))
+                if attempt >= S3_UPLOAD_MAX_ATTEMPTS or not self._has_upload_time_left(delay):
+                    raise
+                logger.warning("Attempt %s to upload %s failed, retrying in %.2f s: %s" % (attempt, s3_path, delay, ex))
+                time.sleep(delay)
+                attempt += 1
 
-    def _upload_files_to_s3(self, files: List[str]):
+    def _has_upload_time_left(self, delay=0):
+        return self.upload_deadline is None or time.monotonic() + delay < self.upload_deadline
+
+    def _retry_pending_uploads(self):
         """
-            Util method to upload objects to S3 bucket
+            Upload the artifacts earlier invocations failed to upload to their original S3 location
         """
-        if self.setup_error is not None:
-            raise Exception(self.setup_error)
+        pending = self.upload_manifest.take_pending()
+        if len(pending) == 0:
+            return
+        logger.info("Retrying upload of %s artifacts from earlier invocations" % len(pending))
+        for entry in pending:
+            s3_client = self._get_pending_upload_client(entry["bucket"])
+            if s3_client is not None:
+                result = self._upload_file(entry["file"], entry["bucket"], entry["key"], entry["fileName"],
+                                           s3_client)
+            else:
+                result = {"upload_successful": False,
+                          "error": Exception("No verified S3 client for bucket %s" % entry["bucket"])}
+            if result.get("upload_successful"):
+                self.upload_manifest.add_uploaded(result["s3_path"])
+            elif self.upload_manifest.add_failed(entry["file"], entry["bucket"], entry["key"], entry["fileName"],
+                                                 result.get("error"), entry["attempts"]):
+                continue
+            try:
+                os.remove(entry["file"])
+            except OSError:
+                logger.exception("Error removing file: %s", entry["file"])
 
-        if not self.setup_done:
-            self.set_s3_client()
+    def _get_pending_upload_client(self, bucket):
+        """
+            Returns the client for the region of the bucket of a pending upload. The client of the run is only valid
+            for the run's bucket, other buckets need a cached client whose ownership was verified, None otherwise
+        """
+        if bucket == self.s3_upload_location["bucket"]:
+            return self.s3_client
+        if not s3_bucket_cache.is_owned(bucket):
+            return None
+        return s3_bucket_cache.get_client(bucket)
 
+    def _process_upload_results(self, files: List[str], results):
+        """
+            Count the uploaded files and collect the upload errors. Files that failed to upload are kept in the
+            upload manifest for the next invocation to retry
+        """
         file_upload_errors = []
         num_files_uploaded = 0
-        results = [self._upload_file(file) for file in files]
-        for result in results:
+        for file, result in zip(files, results):
             if isinstance(result, Exception):
                 file_upload_errors.append(result)
             else:
                 if result.get("upload_successful"):
                     num_files_uploaded += 1
+                    self.upload_manifest.add_uploaded(result["s3_path"])
                 elif result.get("error") is not None:
                     file_upload_errors.append(result.get("error"))
+                    self.upload_manifest.add_failed(file, self.s3_upload_location["bucket"],
+                                                    self.s3_upload_location["key"], os.path.basename(file),
+                                                    result.get("error"))
 
+        if len(file_upload_errors) > 0:
+            # resolve the bucket again next time, it may have been deleted or moved
+            s3_bucket_cache.invalidate(self.s3_upload_location["bucket"])
         return num_files_uploaded, file_upload_errors
 
-    async def _upload_files_to_s3_async(self, files: List[str]):
+    def _get_transfer_config(self):
+        from boto3.s3.transfer import TransferConfig
+        return TransferConfig(multipart_threshold=S3_MULTIPART_THRESHOLD,
+                              multipart_chunksize=S3_MULTIPART_CHUNK_SIZE,
+                              max_concurrency=S3_MULTIPART_CONCURRENCY)
+
+    def _compress_file(self, file):
+        """
+            Compress text artifacts with the content encoding configured for their type into a temporary file.
+            Returns the temporary file and the content encoding, or None and None if the artifact is uploaded
+            as it is
+        """
+        artifact_type = get_artifact_type(os.path.basename(file))
+        if artifact_type is None:
+            return None, None
+        content_encoding = (synthetics_configuration.get_artifact_compression() or {}).get(artifact_type)
+        if not content_encoding:
+            return None, None
+        file_size = os.path.getsize(file)
+        if file_size < ARTIFACT_COMPRESSION_MIN_SIZE:
+            return None, None
+
+        compressed_file = tempfile.TemporaryFile()
+        try:
+            start = time.perf_counter()
+            with open(file, "rb") as source:
+                compress_artifact(source, compressed_file, content_encoding)
+            compression_time_ms = (time.perf_counter() - start) * 1000
+            compressed_size = compressed_file.tell()
+        except Exception:
+            compressed_file.close()
+            logger.exception("Unable to compress %s with %s, uploading it uncompressed" % (file, content_encoding))
+            return None, None
+
+        logger.info("Compressed %s with %s from %s to %s bytes, ratio %.2f in %.1f ms" % (
+            os.path.basename(file), content_encoding, file_size, compressed_size,
+            file_size / max(1, compressed_size), compression_time_ms))
+        if compressed_size >= file_size:
+            compressed_file.close()
+            return None, None
+        compressed_file.seek(0)
+        return compressed_file, content_encoding
+
+    async def _upload_file_async(self, file):
+        return await asyncio.get_event_loop().run_in_executor(None, self._upload_file, file)
+
+    def _upload_files_to_s3(self, files: List[str]):
         """
             Util method to upload objects to S3 bucket
         """
-        if self.setup_error is not None:
-            raise Exception(self.setup_error)
+        self._ensure_s3_client()
 
-        if not self.setup_done:
-            self.set_s3_client()
+        if len(files) > 1:
+            with ThreadPoolExecutor(max_workers=min(self._get_upload_concurrency(), len(files)),
+                                    thread_name_prefix="SyntheticsUploader") as executor:
+                results = list(executor.map(self._upload_file, files))
+        else:
+            results = [self._upload_file(file) for file in files]
+        return self._process_upload_results(files, results)
 
-        file_upload_errors = []
-        num_files_uploaded = 0
-        tasks = [self._upload_file_async(file) for file in files]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        for result in results:
-            if isinstance(result, Exception):
-                file_upload_errors.append(result)
-            else:
-                if result.get("upload_successful"):
-                    num_files_uploaded += 1
-                elif result.get("error") is not None:
-                    file_upload_errors.append(result.get("error"))
+    async def _upload_files_to_s3_async(self, files: List[str]):
+        """
+            Util method to upload objects to S3 bucket
+        """
+        self._ensure_s3_client()
+
+        results = []
+        if len(files) > 0:
+            # put_object blocks, run the uploads on a bounded pool of threads instead of the event loop
+            loop = asyncio.get_event_loop()
+            with ThreadPoolExecutor(max_workers=min(self._get_upload_concurrency(), len(files)),
+                                    thread_name_prefix="SyntheticsUploader") as executor:
+                tasks = [loop.run_in_executor(executor, self._upload_file, file) for file in files]
+                results = await asyncio.gather(*tasks, return_exceptions=True)
+        return self._process_upload_results(files, results)
+
+    def _upload_bundle_to_s3(self, files: List[str]):
+        """
+            Pack the files into one gzip compressed tar, with an index manifest as first member, and upload it
+            as a single object. Returns the number of files uploaded and the upload errors
+        """
+        if len(files) == 0:
+            return 0, []
 
-        return num_files_uploaded, file_upload_errors
+        bucket = self.s3_upload_location["bucket"]
+        key = os.path.join(self.s3_upload_location["key"], ARTIFACT_BUNDLE_NAME)
+        bundle = None
+        try:
+            self._ensure_s3_client()
+            start = time.perf_counter()
+            bundle = self._create_bundle(files)
+            bundle_size = bundle.seek(0, os.SEEK_END)
+            bundle.seek(0)
+            logger.debug("Bundled %s artifacts into %s bytes in %.2f ms" % (
+                len(files), bundle_size, (time.perf_counter() - start) * 1000))
+            extra_args = {
+                "ServerSideEncryption": SSE_KMS,
+                "ContentType": ARTIFACT_BUNDLE_CONTENT_TYPE
+            }
+
+            def upload():
+                bundle.seek(0)
+                self.s3_client.upload_fileobj(bundle, bucket, key, ExtraArgs=extra_args,
+                                              Config=self._get_transfer_config())
+
+            self._call_with_retries(os.path.join(bucket, key), upload)
+            self.upload_manifest.add_uploaded(os.path.join(bucket, key))
+            logger.debug("Finished uploading artifact bundle at %s" % os.path.join(bucket, key))
+            return len(files), []
+        except Exception as ex:
+            logger.exception("Failed to upload artifact bundle")
+            s3_bucket_cache.invalidate(bucket)
+            return 0, [ex]
+        finally:
+            if bundle is not None:
+                bundle.close()
+
+    def _create_bundle(self, files: List[str]):
+        """
+            Write the files to a gzip compressed tar in a temporary file, the manifest lists name and size of
+            each artifact in the order they were added
+        """
+        manifest = {
+            "canaryName": self.canary_name,
+            "artifacts": [{"fileName": os.path.basename(file), "size": os.path.getsize(file)} for file in files]
+        }
+        manifest_contents = json.dumps(manifest).encode("utf-8")
+        manifest_info = tarfile.TarInfo(ARTIFACT_BUNDLE_MANIFEST_NAME)
+        manifest_info.size = len(manifest_contents)
+        manifest_info.mtime = int(time.time())
+
+        bundle = tempfile.TemporaryFile()
+        try:
+            with tarfile.open(fileobj=bundle, mode="w:gz", compresslevel=GZIP_COMPRESSION_LEVEL) as tar:
+                tar.addfile(manifest_info, io.BytesIO(manifest_contents))
+                for file in files:
+                    tar.add(file, arcname=os.path.basename(file))
+        except Exception:
+            bundle.close()
+            raise
+        return bundle
 
     def _delete_temp_files(self, files: List[str]):
         """
@@ -0,0 +1,62 @@
+import threading
+import time
+from ..common.constants import *
+
+
+class S3BucketCache:
+    """
+        Keeps the regional S3 client and the ownership check result of artifact buckets for the lifetime of a
+        warm Lambda container, so they are not resolved again on every invocation. Entries expire after ttl
+        seconds.
+    """
+
+    def __init__(self, ttl=S3_BUCKET_CACHE_TTL):
+        self._ttl = ttl
+        self._clients = {}
+        self._owned = {}
+        self._lock = threading.Lock()
+
+    def get_client(self, bucket):
+        """
+            Returns the cached client for the region of the bucket, None if there is none or it expired
+        """
+        with self._lock:
+            return self._get(self._clients, bucket)
+
+    def set_client(self, bucket, s3_client):
+        with self._lock:
+            self._clients[bucket] = (time.monotonic() + self._ttl, s3_client)
+
+    def is_owned(self, bucket):
+        """
+            Returns True if the bucket ownership was verified within the ttl
+        """
+        with self._lock:
+            return self._get(self._owned, bucket) is True
+
+    def set_owned(self, bucket):
+        with self._lock:
+            self._owned[bucket] = (time.monotonic() + self._ttl, True)
+
+    def invalidate(self, bucket):
+        with self._lock:
+            self._clients.pop(bucket, None)
+            self._owned.pop(bucket, None)
+
+    def clear(self):
+        with self._lock:
+            self._clients = {}
+            self._owned = {}
+
+    def _get(self, entries, bucket):
+        entry = entries.get(bucket)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del entries[bucket]
+            return None
+        return value
+
+
+s3_bucket_cache = S3BucketCache()
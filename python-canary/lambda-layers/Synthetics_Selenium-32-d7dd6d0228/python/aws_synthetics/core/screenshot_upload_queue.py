@@ -0,0 +1,48 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from ..common import synthetics_logger as logger
+from ..common.constants import *
+
+
+class ScreenshotUploadQueue:
+    """
+        Uploads screenshots from background threads, so taking a screenshot does not block the customer step
+        on S3. Upload errors are set on the ScreenshotResult once its upload finished.
+    """
+
+    def __init__(self, max_workers=SCREENSHOT_UPLOAD_CONCURRENCY):
+        self._max_workers = max_workers
+        self._executor = None
+        self._pending = []
+
+    def put(self, uploader, screenshot_result):
+        """
+            Queue the screenshot for upload with the given uploader
+        """
+        if self._executor is None:
+            # threads are reused by warm invocations
+            self._executor = ThreadPoolExecutor(max_workers=self._max_workers,
+                                                thread_name_prefix="SyntheticsScreenshotUpload")
+        self._pending.append(self._executor.submit(self._upload, uploader, screenshot_result))
+
+    def join(self):
+        """
+            Wait for the queued uploads to finish, returns the number of screenshots that failed to upload
+        """
+        pending, self._pending = self._pending, []
+        if not pending:
+            return 0
+        start = time.perf_counter()
+        failed = 0
+        for future in pending:
+            if future.result() is not None:
+                failed += 1
+        logger.debug("Waited %.2f ms for %s screenshot uploads, %s failed" % (
+            (time.perf_counter() - start) * 1000, len(pending), failed))
+        return failed
+
+    def _upload(self, uploader, screenshot_result):
+        upload_errors = uploader.upload_screenshots([screenshot_result])
+        if upload_errors is not None:
+            screenshot_result.with_error(upload_errors.pop())
+        return upload_errors
@@ -0,0 +1,104 @@
+import json
+import os
+import threading
+import uuid
+from ..common import synthetics_logger as logger
+from ..common.constants import *
+
+
+class UploadManifest:
+    """
+        Record of the artifacts uploaded by the current run and of the artifacts that failed to upload. Failed
+        artifacts are moved to a retry directory, so they are not deleted with the temp files, and are uploaded
+        to their original S3 location by the next invocation of the warm container. The pending part of the
+        manifest is kept on disk next to the retry directory.
+    """
+
+    def __init__(self, artifacts_path="/tmp"):
+        self._path = os.path.join(artifacts_path, UPLOAD_MANIFEST_NAME)
+        self._retry_dir = os.path.join(artifacts_path, UPLOAD_RETRY_DIR_NAME)
+        self._lock = threading.Lock()
+        self._uploaded = []
+        self._failed = []
+        self._pending = self._load()
+        # number of pending artifacts that failed in earlier invocations, the others failed in the current run
+        self._earlier_pending_count = len(self._pending)
+
+    def add_uploaded(self, s3_path):
+        with self._lock:
+            self._uploaded.append(s3_path)
+
+    def add_failed(self, file, bucket, key, file_name, error, attempts=0):
+        """
+            Keep a file that failed to upload for the next invocation, attempts is the number of earlier
+            invocations that already failed to upload it. Returns False if the file is not kept
+        """
+        with self._lock:
+            s3_path = os.path.join(bucket, key, file_name)
+            self._failed.append(s3_path)
+            if attempts + 1 >= S3_UPLOAD_MAX_RESUME_ATTEMPTS:
+                logger.error("Giving up on uploading %s after %s invocations: %s" % (s3_path, attempts + 1, error))
+                return False
+            try:
+                os.makedirs(self._retry_dir, exist_ok=True)
+                retry_file = os.path.join(self._retry_dir, uuid.uuid4().hex + "-" + file_name)
+                os.replace(file, retry_file)
+            except OSError:
+                logger.exception("Unable to keep %s for retrying its upload" % file)
+                return False
+            self._pending.append({
+                "file": retry_file,
+                "bucket": bucket,
+                "key": key,
+                "fileName": file_name,
+                "attempts": attempts + 1,
+                "error": str(error)
+            })
+            self._save()
+            return True
+
+    def take_pending(self):
+        """
+            Returns the artifacts earlier invocations failed to upload and removes them from the manifest
+        """
+        with self._lock:
+            pending = self._pending[:self._earlier_pending_count]
+            self._pending = self._pending[self._earlier_pending_count:]
+            self._earlier_pending_count = 0
+            self._save()
+            return pending
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "uploaded": list(self._uploaded),
+                "failed": list(self._failed),
+                "pending": [entry["file"] for entry in self._pending]
+            }
+
+    def reset(self):
+        """
+            Clear the record of the current run, artifacts pending upload are kept
+        """
+        with self._lock:
+            self._uploaded = []
+            self._failed = []
+            self._earlier_pending_count = len(self._pending)
+
+    def _load(self):
+        try:
+            with open(self._path) as f:
+                pending = json.load(f).get("pending", [])
+            return [entry for entry in pending if os.path.isfile(entry.get("file", ""))]
+        except FileNotFoundError:
+            return []
+        except Exception:
+            logger.exception("Unable to read upload manifest %s" % self._path)
+            return []
+
+    def _save(self):
+        try:
+            with open(self._path, "w") as f:
+                json.dump({"pending": self._pending}, f)
+        except Exception:
+            logger.exception("Unable to write upload manifest %s" % self._path)
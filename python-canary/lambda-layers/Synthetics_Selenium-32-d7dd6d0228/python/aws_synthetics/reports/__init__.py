@@ -5,6 +5,7 @@ from .requests_result import RequestsResult
 from .synthetics_link import SyntheticsLink
 from .screenshot_result import ScreenshotResult
 from .broken_link_checker_report import BrokenLinkCheckerReport
+from .runtime_phases import RuntimePhases
 
 __all__ = [
     "SyntheticsReport",
@@ -13,5 +14,6 @@ __all__ = [
     "CustomerScriptResult",
     "BrokenLinkCheckerReport",
     "SyntheticsLink",
-    "ScreenshotResult"
+    "ScreenshotResult",
+    "RuntimePhases"
 ]
\ No newline at end of file
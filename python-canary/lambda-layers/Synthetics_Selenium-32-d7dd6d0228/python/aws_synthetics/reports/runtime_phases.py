@@ -0,0 +1,66 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+def _to_ms(phases):
+    return {phase: round(duration * 1000, 3) for phase, duration in phases.items()}
+
+
+class RuntimePhases:
+    """
+        Time spent in the runtime phases of a canary run, measured with time.perf_counter() to tell runtime overhead
+        apart from the time spent in customer code. Phases can contain other phases or overlap, e.g. launch contains
+        the browser prelaunch and the S3 setup running at the same time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # phase -> seconds, in the order the phases were first recorded
+        self._phases = {}
+        # (step name, phase -> seconds) for each executed step
+        self._steps = []
+
+    @contextmanager
+    def measure(self, phase, step=None):
+        """
+            Add the time spent in the with block to phase, of the run or of a step returned by add_step
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, time.perf_counter() - start, step)
+
+    def add(self, phase, duration, step=None):
+        """
+            Add duration seconds to phase, of the run or of a step returned by add_step
+        """
+        with self._lock:
+            phases = self._phases if step is None else step
+            phases[phase] = phases.get(phase, 0) + duration
+
+    def add_step(self, step_name):
+        step = {}
+        with self._lock:
+            self._steps.append((step_name, step))
+        return step
+
+    def reset(self):
+        with self._lock:
+            self._phases = {}
+            self._steps = []
+
+    def get_phases_in_ms(self, phases):
+        """
+            Time of the given phases of the run recorded so far, phases not recorded are left out
+        """
+        with self._lock:
+            return _to_ms({phase: self._phases[phase] for phase in phases if phase in self._phases})
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "phasesInMs": _to_ms(self._phases),
+                "steps": [{"stepName": step_name, "phasesInMs": _to_ms(step)} for step_name, step in self._steps]
+            }
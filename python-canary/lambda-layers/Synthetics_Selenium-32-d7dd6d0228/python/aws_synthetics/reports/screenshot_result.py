@@ -6,6 +6,8 @@ class ScreenshotResult:
         self.file_name = file_name
         self.page_url = page_url
         self.error = None
+        # file name of an identical screenshot of this run, or S3 path of one uploaded by an earlier run
+        self.duplicate_of = None
 
     def with_file_name(self, file_name):
         self.file_name = file_name
@@ -19,6 +21,10 @@ class ScreenshotResult:
         self.error = error
         return self
 
+    def with_duplicate_of(self, duplicate_of):
+        self.duplicate_of = duplicate_of
+        return self
+
     def get_file_name(self):
         return self.file_name
 
@@ -28,12 +34,18 @@ class ScreenshotResult:
     def get_error(self):
         return self.error
 
+    def get_duplicate_of(self):
+        return self.duplicate_of
+
     def to_dict(self):
-        return dict(
+        result = dict(
             fileName=self.file_name,
             pageUrl=self.page_url,
             error=self.error
         )
+        if self.duplicate_of is not None:
+            result["duplicateOf"] = self.duplicate_of
+        return result
 
     def to_json(self):
         return json.dumps(self.to_dict())
@@ -15,10 +15,13 @@ class SyntheticsReport:
         self.time_spent_in_reset_in_ms = None
         self.time_spent_in_launch_in_ms = None
         self.time_spent_in_setup_in_ms = None
+        self.bootstrap = None
         self.execution_status = ExecutionStatus.NO_RESULT.value
         self.execution_error = None
         self.customer_script = CustomerScriptResult()
         self.configuration = {}
+        self.import_profile = None
+        self.runtime_phases = None
 
     def with_start_time(self, start_time):
         self.start_time = start_time
@@ -44,6 +47,10 @@ class SyntheticsReport:
         self.time_spent_in_setup_in_ms = time_spent_in_setup_in_ms
         return self
 
+    def with_bootstrap(self, bootstrap):
+        self.bootstrap = bootstrap
+        return self
+
     def with_customer_script_result(self, customer_script_result):
         self.customer_script = customer_script_result
         return self
@@ -60,6 +67,14 @@ class SyntheticsReport:
         self.configuration = config
         return self
 
+    def with_import_profile(self, import_profile):
+        self.import_profile = import_profile
+        return self
+
+    def with_runtime_phases(self, runtime_phases):
+        self.runtime_phases = runtime_phases
+        return self
+
     def add_report(self, report):
         self.customer_script.add_report(report)
 
@@ -84,6 +99,9 @@ class SyntheticsReport:
     def get_time_spent_in_setup(self):
         return self.time_spent_in_setup_in_ms
 
+    def get_bootstrap(self):
+        return self.bootstrap
+
     def get_canary_result(self):
         return self.customer_script
 
@@ -93,6 +111,12 @@ class SyntheticsReport:
     def get_configuration(self):
         return self.configuration
 
+    def get_import_profile(self):
+        return self.import_profile
+
+    def get_runtime_phases(self):
+        return self.runtime_phases
+
     def reset(self):
         self.canary_name = None
         self.start_time = None
@@ -100,13 +124,16 @@ class SyntheticsReport:
         self.time_spent_in_reset_in_ms = None
         self.time_spent_in_launch_in_ms = None
         self.time_spent_in_setup_in_ms = None
+        self.bootstrap = None
         self.customer_script.reset()
         self.execution_status = ExecutionStatus.NO_RESULT.value
         self.execution_error = None
         self.configuration = {}
+        self.import_profile = None
+        self.runtime_phases = None
 
     def to_dict(self):
-        return dict(
+        report = dict(
             canaryName=self.canary_name,
             startTime=self.start_time.isoformat(),
             endTime=self.end_time.isoformat(),
@@ -116,8 +143,15 @@ class SyntheticsReport:
             executionStatus=self.execution_status,
             executionError=self.execution_error,
             customerScript=self.customer_script.to_dict(),
-            configuration=self.configuration.to_dict() if self.configuration is not None else None
+            configuration=self.configuration.to_dict() if self.configuration is not None else None,
+            runtimePhases=self.runtime_phases.to_dict() if self.runtime_phases is not None else None
         )
+        if self.bootstrap is not None:
+            # part of timeSpentInLaunchInMs, with the time saved by preparing the run concurrently
+            report["bootstrap"] = self.bootstrap
+        if self.import_profile is not None:
+            report["importProfile"] = self.import_profile
+        return report
 
     def to_json(self):
         return json.dumps(self.to_dict(), indent=2, cls=ComplexEncoder)
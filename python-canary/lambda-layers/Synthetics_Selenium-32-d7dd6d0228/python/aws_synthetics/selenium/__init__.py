@@ -1,28 +1,9 @@
-import io
-import subprocess
 import sys
-import tarfile
 from .constants import *
 from .synthetics_webdriver import SyntheticsWebDriver
+from .chromium_library import ensure_chromium_libraries
 from ..common import synthetics_logger
-
-
-def _decompress_library():
-    import brotli
-    files_to_decompress = ["chromium.br", "aws.tar.br", "swiftshader.tar.br", "fonts.tar.br"]
-    for name in files_to_decompress:
-        synthetics_logger.debug("Decompressing: " + name)
-        f = open(PYTHON_SRC_DEP_PATH + 'chromium/' + name, 'rb')
-        content = f.read()
-        f.close()
-        decompressed_libs = brotli.decompress(content)
-        if name == "chromium.br":
-            with open(CHROMIUM_DIR + "chromium", 'wb') as f:
-                f.write(decompressed_libs)
-                os.chmod(CHROMIUM_DIR + 'chromium', 0o755)  # Octal value for permissions -rwxr-xr-x
-        else:
-            with tarfile.open(fileobj=io.BytesIO(decompressed_libs)) as tf:
-                tf.extractall(path=CHROMIUM_DIR + name.replace(".tar.br", ""))
+from ..common.utils import get_disk_usage
 
 
 def _set_env_variables():
@@ -44,15 +25,25 @@ def _set_env_variables():
 synthetics_webdriver = SyntheticsWebDriver()
 synthetics_logger.info("Setting up selenium libraries")
 _set_env_variables()
-_decompress_library()
 synthetics_logger.info("PATH: " + os.environ['PATH'])
 synthetics_logger.info("PYTHONPATH: " + os.environ['PYTHONPATH'])
 synthetics_logger.info("LD_LIBRARY_PATH: " + os.environ['LD_LIBRARY_PATH'])
 synthetics_logger.info("FONTCONFIG_PATH: " + os.environ['FONTCONFIG_PATH'])
-synthetics_logger.info("/tmp size: " + subprocess.getoutput('du -sh /tmp'))
+synthetics_logger.info("/tmp size: " + get_disk_usage("/tmp"))
 synthetics_logger.info("Completed setting up selenium libraries")
 
+
+def preload_browser_assets(swiftshader=False):
+    """
+        Extract the browser libraries now instead of when the browser is launched, the swiftshader software GL
+        library is only extracted when asked for
+    """
+    libraries = CHROMIUM_BROWSER_LIBRARIES + [SWIFTSHADER_LIBRARY] if swiftshader else CHROMIUM_BROWSER_LIBRARIES
+    ensure_chromium_libraries(libraries)
+
+
 # Public methods and objects that can be imported into Synthetics canary
 __all__ = [
-    "synthetics_webdriver"
+    "synthetics_webdriver",
+    "preload_browser_assets"
 ]
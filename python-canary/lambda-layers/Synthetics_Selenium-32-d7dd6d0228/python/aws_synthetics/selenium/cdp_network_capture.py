@@ -0,0 +1,366 @@
+import base64
+import hashlib
+import json
+import os
+import queue
+import select
+import socket
+import struct
+import threading
+import time
+import urllib.parse
+import urllib.request
+from ..common import synthetics_logger as logger
+from .constants import *
+
+CDP_EVENT_PREFIXES = ("Network.", "Page.")
+CDP_ENABLE_COMMANDS = ["Network.enable", "Page.enable"]
+# sent when the capture stops, the events sent before their responses are still received
+CDP_DISABLE_COMMANDS = ["Network.disable", "Page.disable"]
+# chromedriver window handles are DevTools target ids, older versions prefix them
+CDP_WINDOW_HANDLE_PREFIX = "CDwindow-"
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+WEBSOCKET_OPCODE_CONTINUATION = 0x0
+WEBSOCKET_OPCODE_TEXT = 0x1
+WEBSOCKET_OPCODE_CLOSE = 0x8
+WEBSOCKET_OPCODE_PING = 0x9
+WEBSOCKET_OPCODE_PONG = 0xA
+
+
+class DevToolsConnection:
+    """
+        Minimal blocking websocket client for the DevTools protocol of the local browser. Only text messages
+        and the control frames chromium sends are supported.
+    """
+
+    def __init__(self, ws_url, timeout=CDP_CONNECT_TIMEOUT, max_message_size=CDP_MAX_MESSAGE_SIZE):
+        self._max_message_size = max_message_size
+        # bytes received and not parsed yet, consumed from the front
+        self._buffer = bytearray()
+        # messages over max_message_size that were skipped
+        self.skipped_message_count = 0
+        # the reader thread answers pings while commands can be sent from other threads
+        self._send_lock = threading.Lock()
+        url = urllib.parse.urlparse(ws_url)
+        self._sock = socket.create_connection((url.hostname, url.port or 80), timeout=timeout)
+        try:
+            self._handshake(url)
+        except Exception:
+            self._sock.close()
+            raise
+        # only connecting times out, a frame can arrive split across a pause of any length. get_message waits
+        # for the first frame with select, abort() ends a read waiting for the rest of one
+        self._sock.settimeout(None)
+
+    def send_message(self, message):
+        self._send_frame(WEBSOCKET_OPCODE_TEXT, message.encode("utf-8"))
+
+    def get_message(self, poll_interval):
+        """
+            Returns the next text message, or None if nothing arrived within poll_interval seconds. Messages over
+            the maximum size are skipped without being buffered.
+        """
+        fragments = []
+        message_size = 0
+        skipping = False
+        while True:
+            if not fragments and not skipping and not self._buffer:
+                readable, _, _ = select.select([self._sock], [], [], poll_interval)
+                if not readable:
+                    return None
+            fin, opcode, length = self._read_frame_header()
+            # control frames can arrive between the fragments of a message and are never skipped
+            is_control_frame = opcode & 0x8
+            if not is_control_frame and (skipping or message_size + length > self._max_message_size):
+                self._skip_exact(length)
+                skipping = True
+                if fin:
+                    self.skipped_message_count += 1
+                    logger.warning("Skipped DevTools message of more than %s bytes" % self._max_message_size)
+                    fragments = []
+                    message_size = 0
+                    skipping = False
+                continue
+            payload = self._read_exact(length)
+            if opcode == WEBSOCKET_OPCODE_PING:
+                self._send_frame(WEBSOCKET_OPCODE_PONG, payload)
+            elif opcode == WEBSOCKET_OPCODE_CLOSE:
+                raise ConnectionError("DevTools websocket closed by the browser")
+            elif opcode in (WEBSOCKET_OPCODE_TEXT, WEBSOCKET_OPCODE_CONTINUATION):
+                fragments.append(payload)
+                message_size += length
+                if fin:
+                    return b"".join(fragments).decode("utf-8")
+
+    def abort(self):
+        """
+            End a read blocked on the rest of a frame from another thread, the connection can only be closed afterwards
+        """
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def close(self):
+        try:
+            self._send_frame(WEBSOCKET_OPCODE_CLOSE, b"")
+        except OSError:
+            pass
+        finally:
+            self._sock.close()
+
+    def _handshake(self, url):
+        key = base64.b64encode(os.urandom(16)).decode("ascii")
+        request = ("GET %s HTTP/1.1\r\n"
+                   "Host: %s\r\n"
+                   "Upgrade: websocket\r\n"
+                   "Connection: Upgrade\r\n"
+                   "Sec-WebSocket-Key: %s\r\n"
+                   "Sec-WebSocket-Version: 13\r\n\r\n") % (url.path or "/", url.netloc, key)
+        self._sock.sendall(request.encode("ascii"))
+        while b"\r\n\r\n" not in self._buffer:
+            self._receive()
+        header_end = self._buffer.index(b"\r\n\r\n")
+        lines = self._buffer[:header_end].decode("latin-1").split("\r\n")
+        del self._buffer[:header_end + 4]
+        if " 101 " not in lines[0] + " ":
+            raise ConnectionError("DevTools websocket upgrade failed: %s" % lines[0])
+        expected = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode("ascii")).digest()).decode("ascii")
+        headers = dict(line.split(":", 1) for line in lines[1:] if ":" in line)
+        accept = {name.strip().lower(): value.strip() for name, value in headers.items()}.get("sec-websocket-accept")
+        if accept != expected:
+            raise ConnectionError("Invalid Sec-WebSocket-Accept in DevTools websocket upgrade")
+
+    def _send_frame(self, opcode, payload):
+        length = len(payload)
+        if length < 126:
+            header = struct.pack("!BB", 0x80 | opcode, 0x80 | length)
+        elif length < 1 << 16:
+            header = struct.pack("!BBH", 0x80 | opcode, 0x80 | 126, length)
+        else:
+            header = struct.pack("!BBQ", 0x80 | opcode, 0x80 | 127, length)
+        # client frames must be masked
+        mask = os.urandom(4)
+        repeated_mask = (mask * (length // 4 + 1))[:length]
+        masked = (int.from_bytes(payload, "big") ^ int.from_bytes(repeated_mask, "big")).to_bytes(length, "big")
+        with self._send_lock:
+            self._sock.sendall(header + mask + masked)
+
+    def _read_frame_header(self):
+        """
+            Returns the fin bit, the opcode and the payload length of the next frame, server frames are not masked
+        """
+        first, second = self._read_exact(2)
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack("!H", self._read_exact(2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", self._read_exact(8))[0]
+        return first & 0x80, first & 0x0F, length
+
+    def _read_exact(self, size):
+        while len(self._buffer) < size:
+            self._receive()
+        data = bytes(self._buffer[:size])
+        # deleting from the front of a bytearray does not copy the rest of the buffer
+        del self._buffer[:size]
+        return data
+
+    def _skip_exact(self, size):
+        while size > 0:
+            if not self._buffer:
+                self._receive()
+            skipped = min(size, len(self._buffer))
+            del self._buffer[:skipped]
+            size -= skipped
+
+    def _receive(self):
+        data = self._sock.recv(65536)
+        if not data:
+            raise ConnectionError("DevTools websocket connection lost")
+        self._buffer.extend(data)
+
+
+class CdpNetworkCapture:
+    """
+        Captures Network and Page events over the DevTools websocket of the page driven by the webdriver
+        instead of the chromedriver performance log. Each websocket message is decoded once into a
+        {"method", "params"} event, the shape the HAR parser consumes, and handed to a bounded queue.
+    """
+
+    def __init__(self, debugger_address, window_handle, max_backlog=PERFORMANCE_LOG_MAX_BACKLOG):
+        self._debugger_address = debugger_address
+        self._window_handle = window_handle
+        self._queue = queue.Queue(maxsize=max_backlog)
+        self._ready = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._connection = None
+        self._error = None
+        self._event_count = 0
+        self._max_backlog_size = 0
+        self._skipped_message_count = 0
+        # events the browser was still sending when the stop timeout passed
+        self._dropped_event_count = 0
+
+    def start(self):
+        """
+            Connect to the page target and wait until Network and Page events are enabled
+        """
+        ws_url = self._get_page_websocket_url()
+        logger.debug("Starting CDP network capture on %s" % ws_url)
+        self._connection = DevToolsConnection(ws_url)
+        self._thread = threading.Thread(target=self._run, name="SyntheticsCdpNetworkCapture", daemon=True)
+        self._thread.start()
+        if not self._ready.wait(CDP_CONNECT_TIMEOUT):
+            raise RuntimeError("Timed out enabling CDP network capture on %s" % ws_url)
+        if self._error is not None:
+            raise RuntimeError("Unable to start CDP network capture: %s" % self._error)
+
+    def drain(self, timeout=NETWORK_CAPTURE_DRAIN_TIMEOUT):
+        """
+            Returns the events queued so far. Events are pushed by the browser as they happen, there is nothing
+            to poll
+        """
+        return self.get_events()
+
+    def get_events(self):
+        """
+            Returns the events queued so far, in the order they were received
+        """
+        events = []
+        while True:
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                return events
+
+    def stop(self):
+        """
+            Stop capturing and return the events that were still queued. Events the browser sent before it
+            acknowledged disabling the Network and Page domains are included, unless that takes longer than
+            CDP_STOP_TIMEOUT
+        """
+        self._stopped.set()
+        events = []
+        if self._thread is not None:
+            # the capture stops on its own within CDP_STOP_TIMEOUT, unless it waits for the rest of a message
+            abort_time = time.monotonic() + CDP_ABORT_TIMEOUT
+            # keep consuming so the capture can finish reading buffered messages
+            while self._thread.is_alive():
+                events.extend(self.get_events())
+                if abort_time is not None and time.monotonic() > abort_time:
+                    logger.warning("CDP network capture is still waiting for the rest of a message, closing it")
+                    self._connection.abort()
+                    abort_time = None
+                self._thread.join(0.05)
+            self._thread = None
+        if self._connection is not None:
+            self._skipped_message_count = self._connection.skipped_message_count
+            self._connection.close()
+            self._connection = None
+        events.extend(self.get_events())
+        if self._dropped_event_count > 0:
+            logger.warning("Dropped %s network events still arriving when the CDP capture stopped" %
+                           self._dropped_event_count)
+        logger.debug("Stopped CDP network capture: %s" % json.dumps(self.get_metrics()))
+        return events
+
+    def get_backlog_size(self):
+        """
+            Number of events waiting to be consumed
+        """
+        return self._queue.qsize()
+
+    def get_metrics(self):
+        return {
+            "eventCount": self._event_count,
+            "backlogSize": self.get_backlog_size(),
+            "maxBacklogSize": self._max_backlog_size,
+            "droppedEventCount": self._dropped_event_count,
+            "skippedMessageCount": self._connection.skipped_message_count if self._connection is not None
+            else self._skipped_message_count
+        }
+
+    def _get_page_websocket_url(self):
+        with urllib.request.urlopen("http://%s/json/list" % self._debugger_address,
+                                    timeout=CDP_CONNECT_TIMEOUT) as response:
+            targets = json.loads(response.read())
+        target_id = self._window_handle
+        if target_id.startswith(CDP_WINDOW_HANDLE_PREFIX):
+            target_id = target_id[len(CDP_WINDOW_HANDLE_PREFIX):]
+        for target in targets:
+            if target.get("type") == "page" and target.get("id") == target_id:
+                return target["webSocketDebuggerUrl"]
+        raise RuntimeError("No page target for window %s found at %s" % (self._window_handle, self._debugger_address))
+
+    def _run(self):
+        try:
+            self._capture()
+        except Exception as ex:
+            self._error = ex
+            if not self._stopped.is_set():
+                logger.exception("CDP network capture failed")
+        finally:
+            self._ready.set()
+
+    def _capture(self):
+        pending_commands = self._send_commands(CDP_ENABLE_COMMANDS, 1)
+        disable_commands = None
+        stop_deadline = None
+        while True:
+            if self._stopped.is_set() and disable_commands is None:
+                disable_commands = self._send_commands(CDP_DISABLE_COMMANDS, len(CDP_ENABLE_COMMANDS) + 1)
+                stop_deadline = time.monotonic() + CDP_STOP_TIMEOUT
+            if disable_commands is not None:
+                if not disable_commands:
+                    break
+                if time.monotonic() > stop_deadline:
+                    logger.warning("Browser did not acknowledge disabling network events within %s s" %
+                                   CDP_STOP_TIMEOUT)
+                    self._count_dropped_events()
+                    break
+            message = self._connection.get_message(CDP_POLL_INTERVAL)
+            if message is None:
+                continue
+
+            data = json.loads(message)
+            if "id" in data:
+                if disable_commands is not None and data["id"] in disable_commands:
+                    # an error disabling a domain only means no more events of it arrive
+                    disable_commands.discard(data["id"])
+                    continue
+                if "error" in data:
+                    raise RuntimeError("CDP command %s failed: %s" % (data["id"], data["error"]))
+                pending_commands.discard(data["id"])
+                if not pending_commands:
+                    self._ready.set()
+                continue
+
+            method = data.get("method", "")
+            if method.startswith(CDP_EVENT_PREFIXES):
+                self._queue.put({"method": method, "params": data.get("params", {})})
+                self._event_count += 1
+                self._max_backlog_size = max(self._max_backlog_size, self._queue.qsize())
+
+    def _send_commands(self, methods, first_id):
+        """
+            Send the commands with consecutive ids from first_id, returns the ids waiting for a response
+        """
+        command_ids = set()
+        for command_id, method in enumerate(methods, first_id):
+            command_ids.add(command_id)
+            self._connection.send_message(json.dumps({"id": command_id, "method": method}))
+        return command_ids
+
+    def _count_dropped_events(self):
+        """
+            Count the events the browser has already sent once the stop timeout passed, they are not queued
+        """
+        deadline = time.monotonic() + CDP_POLL_INTERVAL
+        while time.monotonic() < deadline:
+            message = self._connection.get_message(0)
+            if message is None:
+                return
+            if json.loads(message).get("method", "").startswith(CDP_EVENT_PREFIXES):
+                self._dropped_event_count += 1
@@ -0,0 +1,207 @@
+import io
+import json
+import os
+import tarfile
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from ..common import synthetics_logger
+from .constants import *
+
+# libraries extracted or verified by this process
+_ready_libraries = set()
+_ready_libraries_lock = threading.Lock()
+
+
+def ensure_chromium_libraries(libraries):
+    """
+        Extract the libraries that this process has not extracted or verified yet
+    """
+    with _ready_libraries_lock:
+        missing = [name for name in libraries if name not in _ready_libraries]
+        if missing:
+            prepare_chromium_library(libraries=missing)
+            _ready_libraries.update(missing)
+
+
+def needs_swiftshader(arguments):
+    """
+        Returns True if the chrome arguments ask for GL, which is rendered by the swiftshader library
+    """
+    return any(option in argument for argument in arguments for option in SWIFTSHADER_CHROME_ARGUMENTS)
+
+
+def prepare_chromium_library(source_dir=PYTHON_SRC_DEP_PATH + "chromium/", target_dir=CHROMIUM_DIR,
+                             libraries=None):
+    """
+        Decompress the chromium libraries into target_dir. A marker file in target_dir records the source
+        archive and the size, modification time and CRC32 checksum of each extracted file, so a warm container
+        only extracts the libraries that are missing, damaged or changed in the layer.
+        Returns the names of the libraries that were extracted
+    """
+    start = time.perf_counter()
+    libraries = CHROMIUM_LIBRARIES if libraries is None else libraries
+    marker_path = os.path.join(target_dir, CHROMIUM_EXTRACTION_MARKER)
+    marker = _read_marker(marker_path)
+    extracted = []
+    for name in libraries:
+        entry = marker.get(name)
+        if entry is not None and _is_library_intact(entry, os.path.join(source_dir, name), target_dir):
+            continue
+        if entry is not None:
+            synthetics_logger.info("Repairing %s in %s" % (name, target_dir))
+        # the marker must not claim a library while it is being extracted
+        marker.pop(name, None)
+        extracted.append(name)
+
+    if extracted:
+        _write_marker(marker_path, marker)
+        # the libraries are independent, extract them on parallel threads, brotli releases the GIL while it
+        # decompresses. A single vCPU gains nothing from more threads but their memory use
+        max_workers = min(len(extracted), CHROMIUM_EXTRACTION_CONCURRENCY, os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=max_workers,
+                                thread_name_prefix="SyntheticsChromiumExtraction") as executor:
+            futures = [(name, executor.submit(_extract_library, name, os.path.join(source_dir, name), target_dir))
+                       for name in extracted]
+        extraction_error = None
+        for name, future in futures:
+            try:
+                marker[name] = future.result()
+            except Exception as ex:
+                synthetics_logger.exception("Unable to extract %s" % name)
+                extraction_error = extraction_error or ex
+        _write_marker(marker_path, marker)
+        if extraction_error is not None:
+            raise extraction_error
+
+    if not extracted:
+        start_type = "warm"
+    elif len(extracted) == len(libraries):
+        start_type = "cold"
+    else:
+        start_type = "repaired"
+    synthetics_logger.info("Chromium libraries ready in %.0f ms (%s): extracted %s, reused %s" % (
+        (time.perf_counter() - start) * 1000, start_type, extracted,
+        [name for name in libraries if name not in extracted]))
+    return extracted
+
+
+class _BrotliReader(io.RawIOBase):
+    """
+        Stream of the decompressed contents of a brotli compressed file, decompressed one chunk at a time
+    """
+
+    def __init__(self, source, decompressor):
+        self._source = source
+        self._decompressor = decompressor
+        self._buffer = b""
+        self._offset = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while self._offset >= len(self._buffer):
+            chunk = self._source.read(CHROMIUM_EXTRACTION_CHUNK_SIZE)
+            if not chunk:
+                if not self._decompressor.is_finished():
+                    raise EOFError("Compressed library ended before the end of the brotli stream")
+                return 0
+            self._buffer = self._decompressor.process(chunk)
+            self._offset = 0
+        size = min(len(b), len(self._buffer) - self._offset)
+        b[:size] = self._buffer[self._offset:self._offset + size]
+        self._offset += size
+        return size
+
+
+def _extract_library(name, source, target_dir):
+    """
+        Decompress and extract the library straight to disk, without holding the archive in memory
+    """
+    synthetics_logger.debug("Decompressing: " + name)
+    import brotli
+    files = {}
+    with open(source, 'rb') as f:
+        source_stat = os.fstat(f.fileno())
+        reader = io.BufferedReader(_BrotliReader(f, brotli.Decompressor()), CHROMIUM_EXTRACTION_CHUNK_SIZE)
+        if name == "chromium.br":
+            path = os.path.join(target_dir, "chromium")
+            checksum = 0
+            with open(path, 'wb') as target:
+                for chunk in iter(lambda: reader.read(CHROMIUM_EXTRACTION_CHUNK_SIZE), b""):
+                    target.write(chunk)
+                    checksum = zlib.crc32(chunk, checksum)
+            os.chmod(path, 0o755)  # Octal value for permissions -rwxr-xr-x
+            files["chromium"] = _get_file_record(path, checksum)
+        else:
+            library_dir = name.replace(".tar.br", "")
+            # members are extracted in the order they are read from the stream
+            with tarfile.open(fileobj=reader, mode="r|") as tf:
+                for member in tf:
+                    tf.extract(member, path=os.path.join(target_dir, library_dir))
+                    if member.isfile():
+                        path = os.path.join(target_dir, library_dir, member.name)
+                        files[os.path.join(library_dir, member.name)] = _get_file_record(path, _get_checksum(path))
+    return {
+        "sourceSize": source_stat.st_size,
+        "sourceMtime": source_stat.st_mtime_ns,
+        "files": files
+    }
+
+
+def _get_file_record(path, checksum):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns, checksum]
+
+
+def _is_library_intact(entry, source, target_dir):
+    """
+        Returns True if the library was extracted from the current source archive and none of its files were
+        deleted or changed. Files are compared by size and modification time, the checksum is only computed
+        for files that were touched without changing their size
+    """
+    try:
+        source_stat = os.stat(source)
+        if source_stat.st_size != entry["sourceSize"] or source_stat.st_mtime_ns != entry["sourceMtime"]:
+            return False
+        for relative_path, (size, mtime, checksum) in entry["files"].items():
+            path = os.path.join(target_dir, relative_path)
+            stat = os.stat(path)
+            if stat.st_size != size:
+                return False
+            if stat.st_mtime_ns != mtime and _get_checksum(path) != checksum:
+                return False
+        return True
+    except (OSError, KeyError, TypeError, ValueError):
+        return False
+
+
+def _get_checksum(path):
+    checksum = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            checksum = zlib.crc32(chunk, checksum)
+    return checksum
+
+
+def _read_marker(marker_path):
+    try:
+        with open(marker_path) as f:
+            marker = json.load(f)
+        if marker.get("version") == CHROMIUM_EXTRACTION_MARKER_VERSION:
+            return marker.get("libraries", {})
+    except FileNotFoundError:
+        pass
+    except Exception:
+        synthetics_logger.exception("Unable to read %s, extracting all libraries" % marker_path)
+    return {}
+
+
+def _write_marker(marker_path, libraries):
+    os.makedirs(os.path.dirname(marker_path), exist_ok=True)
+    temp_path = marker_path + ".tmp"
+    with open(temp_path, "w") as f:
+        json.dump({"version": CHROMIUM_EXTRACTION_MARKER_VERSION, "libraries": libraries}, f)
+    os.replace(temp_path, marker_path)
@@ -10,5 +10,42 @@ DEFAULT_CHROME_DRIVER_PATH = "/opt/python/lib/chromedriver"
 AWS_BIN_PATH = "/tmp/chromium/aws/"
 SWIFTSHADER_BIN_PATH = "/tmp/chromium/swiftshader/"
 
+# Arguments added to the chrome options of every browser launched
+DEFAULT_CHROME_ARGUMENTS = ["--no-sandbox", "--single-process", "--disable-setuid-sandbox", "--headless", "--no-zygote",
+                            "--disable-dev-shm-usage", "--disable-extensions", "--ignore-certificate-errors"]
+
+# Environment variable turning off the browser launch ahead of the canary, "false" to turn it off
+BROWSER_PRELAUNCH_ENV_VARIABLE = "SYNTHETICS_BROWSER_PRELAUNCH"
+
 DEFAULT_VIEWPORT_WIDTH = 1920
-DEFAULT_VIEWPORT_HEIGHT = 1080
\ No newline at end of file
+DEFAULT_VIEWPORT_HEIGHT = 1080
+
+# Performance log drainer, polling interval in seconds and max number of queued events
+PERFORMANCE_LOG_DRAIN_INTERVAL = 5
+PERFORMANCE_LOG_MAX_BACKLOG = 10000
+
+# Network capture backends used to record page and network events for the HAR file
+NETWORK_CAPTURE_PERFORMANCE_LOG = "performance_log"
+NETWORK_CAPTURE_CDP = "cdp"
+# Max seconds a step boundary waits for the network capture to hand over the events recorded so far
+NETWORK_CAPTURE_DRAIN_TIMEOUT = 2
+# CDP capture, timeouts and poll interval in seconds and max websocket message size in bytes. A capture that
+# did not stop CDP_ABORT_TIMEOUT after it was asked to has its connection closed
+CDP_CONNECT_TIMEOUT = 10
+CDP_STOP_TIMEOUT = 2
+CDP_ABORT_TIMEOUT = 5
+CDP_POLL_INTERVAL = 0.1
+CDP_MAX_MESSAGE_SIZE = 2 ** 24
+
+# Compressed libraries extracted to CHROMIUM_DIR, and the marker recording what was extracted
+CHROMIUM_LIBRARIES = ["chromium.br", "aws.tar.br", "swiftshader.tar.br", "fonts.tar.br"]
+# Libraries extracted when the browser is launched, software GL is only extracted when the chrome options
+# contain one of the SWIFTSHADER_CHROME_ARGUMENTS or when it is preloaded
+CHROMIUM_BROWSER_LIBRARIES = ["chromium.br", "aws.tar.br", "fonts.tar.br"]
+SWIFTSHADER_LIBRARY = "swiftshader.tar.br"
+SWIFTSHADER_CHROME_ARGUMENTS = ("swiftshader", "--use-gl", "--use-angle", "--enable-webgl", "--ignore-gpu-blocklist")
+CHROMIUM_EXTRACTION_MARKER = ".synthetics-extraction.json"
+CHROMIUM_EXTRACTION_MARKER_VERSION = 1
+# Bytes of compressed library read at a time, and number of libraries extracted at the same time
+CHROMIUM_EXTRACTION_CHUNK_SIZE = 1024 * 1024
+CHROMIUM_EXTRACTION_CONCURRENCY = 4
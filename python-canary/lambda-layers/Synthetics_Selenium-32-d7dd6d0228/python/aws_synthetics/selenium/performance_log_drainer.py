@@ -0,0 +1,150 @@
+import json
+import queue
+import threading
+import time
+from ..common import synthetics_logger as logger
+from .constants import *
+
+
+def decode_performance_log(logs):
+    """
+        Decode chromedriver performance log entries into DevTools events
+    """
+    events = []
+    for log in logs:
+        events.append(json.loads(log['message'])['message'])
+    return events
+
+
+class PerformanceLogDrainer:
+    """
+        Polls the chromedriver performance log from a background thread and hands the decoded events
+        to a bounded queue, so the log is not buffered by chromedriver for the whole canary run.
+        Polling happens every interval seconds or when a step boundary drains it. Once the queue
+        is full the drain thread waits for the events to be consumed.
+    """
+
+    def __init__(self, fetch_log, interval=PERFORMANCE_LOG_DRAIN_INTERVAL, max_backlog=PERFORMANCE_LOG_MAX_BACKLOG):
+        self._fetch_log = fetch_log
+        self._interval = interval
+        self._queue = queue.Queue(maxsize=max_backlog)
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        # drain requests made so far and requests covered by the last finished poll
+        self._poll_condition = threading.Condition()
+        self._requested_polls = 0
+        self._finished_polls = 0
+        self._drain_count = 0
+        self._drain_latency_ms = None
+        self._max_drain_latency_ms = 0
+        self._max_backlog_size = 0
+
+    def start(self):
+        logger.debug("Starting performance log drainer with interval %s s" % self._interval)
+        self._thread = threading.Thread(target=self._run, name="SyntheticsPerformanceLogDrainer", daemon=True)
+        self._thread.start()
+
+    def drain(self, timeout=NETWORK_CAPTURE_DRAIN_TIMEOUT):
+        """
+            Ask the drain thread to poll the performance log now instead of waiting for the interval, and return
+            the queued events once that poll finished. Events are consumed while waiting, so a poll blocked on a
+            full queue can finish. After timeout seconds the events of the poll are left for the next drain.
+        """
+        with self._poll_condition:
+            self._requested_polls += 1
+            request = self._requested_polls
+        self._wakeup.set()
+        deadline = time.monotonic() + timeout
+        events = []
+        while True:
+            events.extend(self.get_events())
+            with self._poll_condition:
+                if self._finished_polls >= request or self._stopped.is_set():
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.debug("Performance log poll did not finish within %s s" % timeout)
+                    break
+                self._poll_condition.wait(min(remaining, 0.05))
+        events.extend(self.get_events())
+        return events
+
+    def get_events(self):
+        """
+            Returns the events queued so far, in the order they were recorded
+        """
+        events = []
+        while True:
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                return events
+
+    def stop(self):
+        """
+            Stop the drain thread and return the events that were still queued
+        """
+        self._stopped.set()
+        self._wakeup.set()
+        events = []
+        if self._thread is not None:
+            # keep consuming so a drain blocked on a full queue can finish
+            while self._thread.is_alive():
+                events.extend(self.get_events())
+                self._thread.join(0.05)
+            self._thread = None
+        events.extend(self.get_events())
+        logger.debug("Stopped performance log drainer: %s" % json.dumps(self.get_metrics()))
+        return events
+
+    def get_drain_latency(self):
+        """
+            Time in milliseconds the last poll took to fetch, decode and queue the performance log
+        """
+        return self._drain_latency_ms
+
+    def get_backlog_size(self):
+        """
+            Number of decoded events waiting to be consumed
+        """
+        return self._queue.qsize()
+
+    def get_metrics(self):
+        return {
+            "drainCount": self._drain_count,
+            "drainLatencyMs": self._drain_latency_ms,
+            "maxDrainLatencyMs": self._max_drain_latency_ms,
+            "backlogSize": self.get_backlog_size(),
+            "maxBacklogSize": self._max_backlog_size
+        }
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self._interval)
+            self._wakeup.clear()
+            if self._stopped.is_set():
+                break
+            with self._poll_condition:
+                requested_polls = self._requested_polls
+            try:
+                self._drain()
+            except Exception:
+                logger.exception("Unable to drain performance log")
+            finally:
+                with self._poll_condition:
+                    self._finished_polls = requested_polls
+                    self._poll_condition.notify_all()
+
+    def _drain(self):
+        start = time.perf_counter()
+        events = decode_performance_log(self._fetch_log())
+        for event in events:
+            self._queue.put(event)
+        self._drain_count += 1
+        self._drain_latency_ms = (time.perf_counter() - start) * 1000
+        self._max_drain_latency_ms = max(self._max_drain_latency_ms, self._drain_latency_ms)
+        backlog_size = self.get_backlog_size()
+        self._max_backlog_size = max(self._max_backlog_size, backlog_size)
+        logger.debug("Drained %s performance log events in %.2f ms, backlog size: %s" % (
+            len(events), self._drain_latency_ms, backlog_size))
@@ -1,4 +1,6 @@
+import hashlib
 from ..common import synthetics_logger as logger
+from ..common import synthetics_configuration
 from ..reports import ScreenshotResult
 from ..core import BaseSyntheticsScreenshot
 from .constants import *
@@ -26,30 +28,42 @@ class SyntheticsScreenshot(BaseSyntheticsScreenshot):
 
             filename = number_prefix + "-" + step_suffix_name + ".png"
             path = self._location + "/" +filename
-            browser.save_screenshot(path)
+            png = browser.get_screenshot_as_png()
             self._count += 1
 
+            digest = None
+            if synthetics_configuration.get_screenshot_deduplication():
+                digest = hashlib.sha256(png).hexdigest()
+                duplicate_of = self.find_duplicate(digest)
+                if duplicate_of is not None:
+                    logger.info("Screenshot %s is identical to %s, not storing it again" % (filename, duplicate_of))
+                    return self.add_screenshot_result(step_name, filename, browser.current_url, duplicate_of)
+
+            with open(path, "wb") as f:
+                f.write(png)
             logger.info("Screenshot saved at %s" % path)
-            return self.add_screenshot_result(step_name, filename, browser.current_url)
+            screenshot_result = self.add_screenshot_result(step_name, filename, browser.current_url)
+            if digest is not None:
+                self.index_screenshot(digest, screenshot_result)
+            return screenshot_result
         except Exception:
             logger.error("Screenshot failed for step name: %s" % step_name)
             raise
 
-    def add_screenshot_result(self, step_name, file_name, page_url):
+    def add_screenshot_result(self, step_name, file_name, page_url, duplicate_of=None):
         """
             Adds screenshot result to map  and
             returns fileName and page url of screenshot
         """
-        screenshot_result = ScreenshotResult(file_name, page_url)
+        screenshot_result = ScreenshotResult(file_name, page_url).with_duplicate_of(duplicate_of)
         if self._screenshots.get(step_name) is not None:
             self._screenshots[step_name].append(screenshot_result)
         else:
             self._screenshots[step_name] = [screenshot_result]
 
-        if self._uploader is not None:
-            upload_errors = self._uploader.upload_screenshots([screenshot_result])
-            if upload_errors is not None:
-                screenshot_result = screenshot_result.with_error(upload_errors.pop())
+        if self._uploader is not None and duplicate_of is None:
+            # the upload error, if any, is set on the screenshot result once the upload finished
+            self._upload_queue.put(self._uploader, screenshot_result)
 
         self._current_step_screenshots.append(screenshot_result)
         return screenshot_result
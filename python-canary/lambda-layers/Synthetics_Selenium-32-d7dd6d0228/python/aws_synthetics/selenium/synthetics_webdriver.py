@@ -1,11 +1,12 @@
-import json
-from ..common import synthetics_logger as logger
+from ..common import synthetics_logger as logger, synthetics_configuration
 from ..common.constants import *
 from ..core import BaseSynthetics
 from .synthetics_screenshot import SyntheticsScreenshot
 from .synthetics_uploader import SyntheticsUploader
+from .performance_log_drainer import PerformanceLogDrainer, decode_performance_log
+from .chromium_library import ensure_chromium_libraries, needs_swiftshader
 from .constants import *
-import re
+from urllib.parse import urlsplit
 
 
 class SyntheticsWebDriver(BaseSynthetics):
@@ -19,6 +20,20 @@ class SyntheticsWebDriver(BaseSynthetics):
         self._uploader = SyntheticsUploader(ARTIFACTS_PATH)
         self._screenshot = SyntheticsScreenshot(ARTIFACTS_PATH)
         self._screenshot.set_uploader(self._uploader)
+        self._network_capture = None
+        self._network_capture_backend = NETWORK_CAPTURE_PERFORMANCE_LOG
+        # options and capabilities the browser was launched with, browser kept open by the previous run or launched
+        # ahead of the canary, and URLs of the documents loaded in the browser, whose storage is cleared before it
+        # is reused
+        self._browser_options = None
+        self._browser_capabilities = None
+        self._warm_browser = None
+        self._warm_browser_prelaunched = False
+        # launch the browser of the next run ahead of the canary, see prelaunch_browser
+        self._browser_prelaunch = True
+        self._browser_documents = set()
+        self._har.add_event_handler("Network.responseReceived", self._add_request_result)
+        self._har.add_event_handler("Network.requestWillBeSent", self._add_browser_document)
 
     def get_http_response(self, url):
         """
@@ -45,41 +60,87 @@ class SyntheticsWebDriver(BaseSynthetics):
             if self._browser is not None:
                 logger.warning("Selenium Browser already exists.  Reusing existing browser.")
                 return self._browser
-            from selenium import webdriver
             from selenium.webdriver.chrome.options import Options
-            from .synthetics_browser import SyntheticsBrowser
 
             logger.info('Launching browser.')
             if chrome_options is None:
                 logger.debug("Using default Chrome options")
                 chrome_options = Options()
 
-            chrome_options.add_argument('--no-sandbox')
-            chrome_options.add_argument('--single-process')
-            chrome_options.add_argument('--disable-setuid-sandbox')
-            chrome_options.add_argument('--headless')
-            chrome_options.add_argument('--no-zygote')
-            chrome_options.add_argument('--disable-dev-shm-usage')
-            chrome_options.add_argument('--disable-extensions')
-            chrome_options.add_argument('--ignore-certificate-errors')
+            self._add_synthetics_options(chrome_options)
+            capabilities = chrome_options.to_capabilities()
+            if self._warm_browser is not None:
+                self._browser = self._reuse_warm_browser(capabilities)
+                if self._browser is not None:
+                    self._start_network_capture()
+                    return self._browser
+            self._browser = self._launch_browser(chrome_options)
+            self._start_network_capture()
+            return self._browser
+        except Exception as ex:
+            self.add_execution_error("Unable to create chromium", ex)
+            logger.error(ex)
+            raise
+
+    def _add_synthetics_options(self, chrome_options):
+        """
+            Add the arguments and capabilities the runtime needs to the chrome options of the canary
+        """
+        chrome_arguments = list(DEFAULT_CHROME_ARGUMENTS)
+        self._network_capture_backend = synthetics_configuration.get_network_capture_backend()
+        if self._network_capture_backend == NETWORK_CAPTURE_PERFORMANCE_LOG:
             chrome_options.set_capability('goog:loggingPrefs', {'performance': 'INFO'})
             chrome_options.set_capability('goog:perfLoggingPrefs', {
                 'traceCategories': 'browser,devtools.timeline,devtools',
                 'enableNetwork': True,
                 'enablePage': True
             })
-            if self._canary_user_agent_string is not None:
-                chrome_options.add_argument('user-agent=' + self._canary_user_agent_string)
-            chrome_options.binary_location = DEFAULT_CHROMIUM_PATH
-            logger.info("Creating chromium instance")
-            logger.info("Chromium executable exists? " + os.path.exists(DEFAULT_CHROMIUM_PATH))
-            self._browser = SyntheticsBrowser(chrome_options=chrome_options, synthetics_screenshot=self._screenshot)
-            logger.info("Created chromium instance")
-            return self._browser
-        except Exception as ex:
-            self.add_execution_error("Unable to create chromium", ex)
-            logger.error(ex)
-            raise
+        if self._canary_user_agent_string is not None:
+            chrome_arguments.append('user-agent=' + self._canary_user_agent_string)
+        # options kept by the canary module between runs already contain the arguments added by an earlier run
+        for argument in chrome_arguments:
+            if argument not in chrome_options.arguments:
+                chrome_options.add_argument(argument)
+        chrome_options.binary_location = DEFAULT_CHROMIUM_PATH
+
+    def prelaunch_browser(self):
+        """
+            Launch the browser ahead of the customer canary. Chrome() uses it when it is called with the same options.
+            A cold start launches it with the default options, a warm run with the options of the previous run. It is
+            launched whether browser reuse is enabled or not, unless the browser kept by the previous run is reused.
+            Once a run does not use the browser launched ahead of it, because the canary changed its options or
+            did not launch a browser, the execution environment stops launching it ahead.
+            Setting SYNTHETICS_BROWSER_PRELAUNCH to false turns it off.
+        """
+        if os.getenv(BROWSER_PRELAUNCH_ENV_VARIABLE, "true").lower() != "true":
+            return
+        if not self._browser_prelaunch or self._browser is not None or self._warm_browser is not None:
+            return
+        chrome_options = self._browser_options
+        if chrome_options is None:
+            from selenium.webdriver.chrome.options import Options
+            chrome_options = Options()
+            self._add_synthetics_options(chrome_options)
+        logger.info("Launching browser ahead of the canary")
+        self._warm_browser = self._launch_browser(chrome_options)
+        self._warm_browser_prelaunched = True
+
+    def _launch_browser(self, chrome_options):
+        from .synthetics_browser import SyntheticsBrowser
+        # extracted on the first launch, canaries that never launch a browser only extract it if it is launched ahead
+        with self._runtime_phases.measure("extraction"):
+            ensure_chromium_libraries(CHROMIUM_BROWSER_LIBRARIES)
+            if needs_swiftshader(chrome_options.arguments):
+                ensure_chromium_libraries([SWIFTSHADER_LIBRARY])
+        logger.info("Creating chromium instance")
+        logger.info("Chromium executable exists? %s" % os.path.exists(DEFAULT_CHROMIUM_PATH))
+        with self._runtime_phases.measure("browserLaunch"):
+            browser = SyntheticsBrowser(chrome_options=chrome_options, synthetics_screenshot=self._screenshot)
+        self._browser_options = chrome_options
+        self._browser_capabilities = chrome_options.to_capabilities()
+        self._browser_documents = set()
+        logger.info("Created chromium instance")
+        return browser
 
     async def close(self):
         """
@@ -146,6 +207,21 @@ class SyntheticsWebDriver(BaseSynthetics):
 
         return self._browser.save_screenshot(step_name, suffix)
 
+    async def collect_har_events(self):
+        """
+            Add the page and network events recorded so far to the HAR, so they do not have to be fetched at once
+            at the end of the canary run
+        """
+        try:
+            if self._browser is None:
+                return
+            if self._network_capture is not None:
+                self._process_events(self._network_capture.drain())
+            elif self._network_capture_backend == NETWORK_CAPTURE_PERFORMANCE_LOG:
+                self._process_events(decode_performance_log(self._get_performance_log()))
+        except Exception:
+            logger.exception("Unable to collect page and network events")
+
     async def generate_har_file(self):
         """
             Process recorded page and network events and generate HAR file
@@ -155,53 +231,208 @@ class SyntheticsWebDriver(BaseSynthetics):
                 logger.info("No active browser instance. HAR generation will be skipped.")
                 return
 
-            self._browser.command_executor._commands.update({
-                'getAvailableLogTypes': ('GET', '/session/$sessionId/log/types'),
-                'getLog': ('POST', '/session/$sessionId/log')})
-
-            logs = self._browser.execute('getLog', {'type': 'performance'})['value']
-            events = []
-            for log in logs:
-                events.append(json.loads(log['message'])['message'])
-            har_content = self._har._generate_har(events)
-            self._generate_request_result(events)
-            file = open(os.path.join(ARTIFACTS_PATH, HAR_FILE_NAME), 'w')
-            file.write(self._har.get_har_html(har_content))
+            self._process_events(self._stop_network_capture())
+            if self._network_capture_backend == NETWORK_CAPTURE_PERFORMANCE_LOG:
+                self._process_events(decode_performance_log(self._get_performance_log()))
+            with open(os.path.join(ARTIFACTS_PATH, HAR_FILE_NAME), 'w') as file:
+                self._har.write_har_html(file)
         except Exception as ex:
             logger.exception("Unable to generate har file")
             self.add_execution_error("Unable to generate har file", ex)
 
-    def _generate_request_result(self, events):
-
-        for event in events:
-            params = event["params"]
-            method = event["method"]
-
-            if not re.match(r"^(Page|Network)\..+", method):
-                continue
-            if method == "Network.responseReceived":
-                if params["response"]:
-                    status_code = params["response"]["status"]
-                    logger.debug("status code: %s", status_code)
-                    if status_code is None:
-                        self._request_result.increment_failed_requests()
-                    elif 300 > status_code >= 200:
-                        self._request_result.increment_successful_requests()
-                    elif 400 > status_code >= 300:
-                        self._request_result.increment_redirected_requests()
-                    elif 500 > status_code >= 400:
-                        self._request_result.increment_error_requests()
-                    elif 600 > status_code >= 500:
-                        self._request_result.increment_fault_requests()
-                    else:
-                        self._request_result.increment_failed_requests()
+    def _reuse_warm_browser(self, capabilities):
+        """
+            Return the browser launched ahead of the canary, or the browser kept open by the previous run with its
+            state cleared. Returns None if it can not be used and a new browser has to be launched
+        """
+        self._browser = self._warm_browser
+        prelaunched = self._warm_browser_prelaunched
+        self._warm_browser = None
+        self._warm_browser_prelaunched = False
+        if not prelaunched and not synthetics_configuration.get_browser_reuse():
+            logger.info("Browser reuse is disabled, closing the browser kept by the previous run")
+        elif capabilities != self._browser_capabilities:
+            logger.info("Chrome options changed, closing the browser launched before")
+            if prelaunched:
+                self._browser_prelaunch = False
+        elif prelaunched:
+            logger.info("Using the browser launched ahead of the canary")
+            return self._browser
+        else:
+            try:
+                with self._runtime_phases.measure("browserReset"):
+                    self._reset_browser_state()
+                logger.info("Reusing the browser kept by the previous run")
+                return self._browser
+            except Exception:
+                logger.exception("Browser kept by the previous run is not responding, launching a new browser")
+        self._quit_browser(self._browser)
+        self._browser = None
+        return None
+
+    def _reset_browser_state(self):
+        """
+            Bring a browser kept by the previous run back to the state of a newly launched one. Raises if the
+            browser or chromedriver is no longer responding.
+        """
+        browser = self._browser
+        # a fresh tab replaces all open windows, so session storage and history of the previous run are dropped
+        handles = browser.window_handles
+        browser.switch_to.new_window("tab")
+        blank_handle = browser.current_window_handle
+        for handle in handles:
+            browser.switch_to.window(handle)
+            browser._browser.close()
+        browser.switch_to.window(blank_handle)
+
+        for origin in self._get_browser_origins():
+            browser.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+        browser.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        # a newly launched browser starts with an empty cache, keep load times comparable between runs
+        browser.execute_cdp_cmd("Network.clearBrowserCache", {})
+        self._browser_documents = set()
+
+        browser._browser.get("about:blank")
+        browser.implicitly_wait(0)
+        browser.set_page_load_timeout(300)
+        browser.set_script_timeout(30)
+        browser.set_viewport_size(width=DEFAULT_VIEWPORT_WIDTH, height=DEFAULT_VIEWPORT_HEIGHT)
+        if self._network_capture_backend == NETWORK_CAPTURE_PERFORMANCE_LOG:
+            # events of the previous run and of the reset itself are not part of this run
+            self._get_performance_log()
 
+    def _get_browser_origins(self):
+        """
+            Origins of the documents loaded in the browser since it was launched or last reset
+        """
+        origins = set()
+        for url in self._browser_documents:
+            parsed = urlsplit(url)
+            if parsed.scheme in ("http", "https") and parsed.netloc:
+                origins.add("%s://%s" % (parsed.scheme, parsed.netloc))
+        return origins
+
+    def _add_browser_document(self, params):
+        document_url = params.get("documentURL")
+        if document_url:
+            self._browser_documents.add(document_url)
+
+    def _quit_browser(self, browser):
+        """
+            Quit a browser kept by the previous run or launched ahead of the canary, it is not part of the current run
+            so errors are only logged
+        """
+        try:
+            if browser._browser is not None:
+                browser._browser.quit()
+                browser._browser = None
+            logger.info("Browser closed")
+        except Exception:
+            logger.exception("Unable to close the browser kept by the previous run")
+
+    def _get_performance_log(self):
+        """
+            Fetch the performance log entries buffered by chromedriver since the last call
+        """
+        self._browser.command_executor._commands.update({
+            'getAvailableLogTypes': ('GET', '/session/$sessionId/log/types'),
+            'getLog': ('POST', '/session/$sessionId/log')})
+
+        return self._browser.execute('getLog', {'type': 'performance'})['value']
+
+    def _start_network_capture(self):
+        """
+            Start recording page and network events in the background. With the performance log backend this
+            only happens if a drain interval is configured, otherwise the log is fetched at step boundaries
+        """
+        if self._network_capture_backend == NETWORK_CAPTURE_CDP:
+            from .cdp_network_capture import CdpNetworkCapture
+            try:
+                debugger_address = self._browser.capabilities['goog:chromeOptions']['debuggerAddress']
+                # the events of the window the canary drives, other tabs and windows are not captured
+                self._network_capture = CdpNetworkCapture(debugger_address, self._browser.current_window_handle)
+                self._network_capture.start()
+            except Exception:
+                logger.exception("Unable to start CDP network capture, HAR file will not contain network events")
+                self._stop_network_capture()
+            return
+        if self._network_capture_backend != NETWORK_CAPTURE_PERFORMANCE_LOG:
+            logger.warning("Unknown network capture backend: %s" % self._network_capture_backend)
+            return
+
+        interval = synthetics_configuration.get_performance_log_drain_interval()
+        if not interval:
+            return
+        self._network_capture = PerformanceLogDrainer(self._get_performance_log, interval)
+        self._network_capture.start()
+
+    def _stop_network_capture(self):
+        """
+            Stop the background capture and return the events it has not handed over yet
+        """
+        if self._network_capture is None:
+            return []
+        try:
+            return self._network_capture.stop()
+        finally:
+            self._network_capture = None
+
+    def _process_events(self, events):
+        """
+            Build the HAR and the request results from recorded events in a single pass
+        """
+        self._har.add_events(events)
+
+    def _add_request_result(self, params):
+        if params["response"]:
+            status_code = params["response"]["status"]
+            logger.debug("status code: %s", status_code)
+            if status_code is None:
+                self._request_result.increment_failed_requests()
+            elif 300 > status_code >= 200:
+                self._request_result.increment_successful_requests()
+            elif 400 > status_code >= 300:
+                self._request_result.increment_redirected_requests()
+            elif 500 > status_code >= 400:
+                self._request_result.increment_error_requests()
+            elif 600 > status_code >= 500:
+                self._request_result.increment_fault_requests()
+            else:
+                self._request_result.increment_failed_requests()
+
+    async def release_browser(self):
+        """
+            Keep the browser open for the next run if browser reuse is enabled, close it otherwise
+        """
+        if self._warm_browser is not None and self._warm_browser_prelaunched:
+            logger.info("Browser launched ahead of the canary was not used, no longer launching it ahead")
+            self._quit_browser(self._warm_browser)
+            self._warm_browser = None
+            self._warm_browser_prelaunched = False
+            self._browser_prelaunch = False
+        if not synthetics_configuration.get_browser_reuse():
+            if self._warm_browser is not None:
+                self._quit_browser(self._warm_browser)
+                self._warm_browser = None
+            await self.close_browser()
+            return
+        if self._browser is None:
+            return
+        try:
+            self._stop_network_capture()
+        except Exception:
+            logger.exception("Unable to stop network capture")
+        self._warm_browser = self._browser
+        self._warm_browser_prelaunched = False
+        self._browser = None
+        logger.info("Browser kept open for the next run")
 
     async def close_browser(self):
         """
             Close browser instance
         """
         try:
+            self._stop_network_capture()
             if self._browser is not None:
                 if self._browser._browser is not None:
                     self._browser._browser.quit()
@@ -1,12 +1,22 @@
 import asyncio
+import hashlib
 import inspect
 import json
 import math
 import logging
 import importlib, os
+import time
 from datetime import datetime
 from aws_synthetics.selenium import synthetics_webdriver as webdriver, constants
-from aws_synthetics.common import synthetics_logger as logger, CanaryStatus
+from aws_synthetics.common import synthetics_logger as logger, CanaryStatus, ImportProfiler
+
+# Set to "true" to execute the customer canary file on every invocation, for canaries that depend on module level
+# state being initialized for each run
+FRESH_IMPORT_ENV_VARIABLE = "SYNTHETICS_FRESH_IMPORT"
+# Set to "true" to record the time spent importing each module while loading the customer canary file
+IMPORT_PROFILE_ENV_VARIABLE = "SYNTHETICS_IMPORT_PROFILE"
+# Customer canary modules loaded in this execution environment, path -> (module, mtime, size, source sha256)
+customer_canary_modules = {}
 
 
 def handler(event, context):
@@ -20,16 +30,17 @@ async def handle_canary(event, context):
     reset_time = None
     setup_time = None
     launch_time = None
+    launch_start = None
     try:
-        # reset synthetics
-        reset_time = datetime.now()
+        # reset synthetics, phases are timed with the monotonic clock
+        reset_start = time.perf_counter()
         await webdriver.reset()
-        reset_time = (datetime.now() - reset_time).total_seconds() * 1000
+        reset_time = (time.perf_counter() - reset_start) * 1000
 
         logger.info("Start canary")
 
         # setup
-        setup_time = datetime.now()
+        setup_start = time.perf_counter()
         webdriver.set_event_and_context(event, context)
 
         # Setup for the Lambda extension
@@ -44,17 +55,17 @@ async def handle_canary(event, context):
 
         # before canary
         await webdriver.before_canary()
-        setup_time = (datetime.now() - setup_time).total_seconds() * 1000
+        setup_time = (time.perf_counter() - setup_start) * 1000
 
-        # launch
-        launch_time = datetime.now()
-        launch_time = (datetime.now() - launch_time).total_seconds() * 1000
+        # launch, the browser and the S3 and CloudWatch clients are prepared concurrently
+        launch_start = time.perf_counter()
+        await webdriver.bootstrap()
+        launch_time = (time.perf_counter() - launch_start) * 1000
     except Exception:
         logger.exception("Error launching canary")
-        launch_time = launch_time if launch_time else datetime.now()
         start_time = datetime.now()
         end_time = start_time
-        launch_time = (datetime.now() - launch_time).total_seconds() * 1000
+        launch_time = (time.perf_counter() - launch_start) * 1000 if launch_start is not None else 0
         return_value = await webdriver.after_canary(canary_result, canary_error, start_time, end_time, reset_time,
                                                     setup_time, launch_time)
         logger.info("End Canary. Result %s" % json.dumps(return_value))
@@ -80,15 +91,23 @@ async def handle_canary(event, context):
         # Call customer's execution handler
         if not os.path.isfile(absolute_file_path):
             raise ModuleNotFoundError('No module named: %s' % file_name)
-        spec = importlib.util.spec_from_file_location(file_name, os.path.normpath(absolute_file_path))
-        customer_canary = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(customer_canary)
+        import_profiler = ImportProfiler() if os.getenv(IMPORT_PROFILE_ENV_VARIABLE, "false").lower() == "true" else None
+        if import_profiler is not None:
+            import_profiler.start()
+        try:
+            with webdriver.measure_runtime_phase("import"):
+                customer_canary = load_customer_canary(file_name, os.path.normpath(absolute_file_path))
+        finally:
+            if import_profiler is not None:
+                import_profiler.stop()
+                webdriver.add_import_profile(import_profiler)
         logger.info("Calling customer canary: %s.%s()" % (file_name, function_name))
         handler = getattr(customer_canary, function_name)
-        if inspect.iscoroutinefunction(handler):
-            response = await handler(event, context)
-        else:
-            response = handler(event, context)
+        with webdriver.measure_runtime_phase("customerCanary"):
+            if inspect.iscoroutinefunction(handler):
+                response = await handler(event, context)
+            else:
+                response = handler(event, context)
         logger.info("Customer canary response %s" % json.dumps(response))
         end_time = datetime.now()
         if webdriver.get_step_errors():
@@ -107,4 +126,43 @@ async def handle_canary(event, context):
     # workflow expects null to be stringified
     return_value["testRunError"] = "null" if return_value["testRunError"] is None else return_value["testRunError"]
     return_value["executionError"] = "null" if return_value["executionError"] is None else return_value["executionError"]
-    return json.dumps(return_value)
\ No newline at end of file
+    return json.dumps(return_value)
+
+
+def load_customer_canary(file_name, file_path):
+    """
+        Load the customer canary module, reusing the module loaded by an earlier warm invocation if the file did not
+        change so module level imports and setup only run once per execution environment
+    """
+    fresh_import = os.getenv(FRESH_IMPORT_ENV_VARIABLE, "false").lower() == "true"
+    # taken before the module is executed, an edit made during the import makes the next invocation load it again
+    stat = os.stat(file_path)
+    digest = None
+    cached = None if fresh_import else customer_canary_modules.get(file_path)
+    if cached is not None:
+        module, mtime, size, cached_digest = cached
+        if mtime == stat.st_mtime_ns and size == stat.st_size:
+            logger.info("Reusing customer canary module loaded by an earlier invocation: %s" % file_path)
+            return module
+        # the timestamp can change without the content, e.g. when the file is copied again
+        digest = _hash_file(file_path)
+        if digest == cached_digest:
+            customer_canary_modules[file_path] = (module, stat.st_mtime_ns, stat.st_size, digest)
+            logger.info("Reusing customer canary module loaded by an earlier invocation: %s" % file_path)
+            return module
+
+    if fresh_import:
+        customer_canary_modules.pop(file_path, None)
+    elif digest is None:
+        digest = _hash_file(file_path)
+    spec = importlib.util.spec_from_file_location(file_name, file_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    if not fresh_import:
+        customer_canary_modules[file_path] = (module, stat.st_mtime_ns, stat.st_size, digest)
+    return module
+
+
+def _hash_file(file_path):
+    with open(file_path, "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()
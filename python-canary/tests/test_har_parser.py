@@ -0,0 +1,101 @@
+import json
+import os
+import sys
+import time
+
+import pytest
+
+LAYER_PYTHON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "lambda-layers",
+                                 "Synthetics_Selenium-32-d7dd6d0228", "python")
+sys.path.insert(0, LAYER_PYTHON_PATH)
+
+from aws_synthetics.common.har_parser import HarParser  # noqa: E402
+
+# HAR built by HarParser._generate_har before the HAR was built incrementally, from the events of make_events()
+EXPECTED_HAR_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "har_late_events.json")
+
+
+@pytest.fixture(autouse=True)
+def utc(monkeypatch):
+    # entry start times are local times
+    monkeypatch.setenv("TZ", "UTC")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def _response(url, request_time, status=200):
+    return {
+        "url": url, "status": status, "statusText": "OK", "mimeType": "text/html", "protocol": "http/1.1",
+        "headers": {"Content-Type": "text/html", "Content-Length": "1024"}, "requestHeaders": {"Accept": "*/*"},
+        "headersText": "HTTP/1.1 200 OK\r\n\r\n", "encodedDataLength": 300, "connectionId": 7,
+        "remoteIPAddress": "192.0.2.1", "fromDiskCache": False,
+        "timing": {"requestTime": request_time, "dnsStart": 0, "dnsEnd": 1, "connectStart": 1, "connectEnd": 2,
+                   "sslStart": -1, "sslEnd": -1, "sendStart": 2, "sendEnd": 3, "receiveHeadersEnd": 10,
+                   "pushStart": 0}
+    }
+
+
+def _request_will_be_sent(request_id, url, timestamp, **params):
+    return {"method": "Network.requestWillBeSent", "params": dict({
+        "requestId": request_id, "frameId": "frame", "timestamp": timestamp, "wallTime": 1700000000 + timestamp,
+        "initiator": {"type": "other"},
+        "request": {"url": url, "method": "GET", "initialPriority": "High", "headers": {"Accept": "*/*"}}}, **params)}
+
+
+def make_events():
+    """
+        Requests that get dataReceived, resourceChangedPriority and requestServedFromCache events after their
+        loading finished or failed, as Chrome sends them when the performance log is drained at a step boundary
+    """
+    return [
+        {"method": "Page.frameStartedLoading", "params": {"frameId": "frame"}},
+        _request_will_be_sent("r1", "https://example.com/", 10.0),
+        {"method": "Network.responseReceived", "params": {
+            "requestId": "r1", "frameId": "frame", "response": _response("https://example.com/", 10.0)}},
+        {"method": "Network.dataReceived", "params": {"requestId": "r1", "dataLength": 1000}},
+        {"method": "Network.loadingFinished", "params": {"requestId": "r1", "timestamp": 10.5,
+                                                         "encodedDataLength": 1300}},
+        {"method": "Network.dataReceived", "params": {"requestId": "r1", "dataLength": 500}},
+        {"method": "Network.resourceChangedPriority", "params": {"requestId": "r1", "newPriority": "Low"}},
+        _request_will_be_sent("f1", "https://example.com/aborted.js", 11.0),
+        {"method": "Network.responseReceived", "params": {
+            "requestId": "f1", "frameId": "frame", "response": _response("https://example.com/aborted.js", 11.0)}},
+        {"method": "Network.loadingFailed", "params": {"requestId": "f1", "timestamp": 11.2,
+                                                        "errorText": "net::ERR_ABORTED", "canceled": True}},
+        {"method": "Network.dataReceived", "params": {"requestId": "f1", "dataLength": 250}},
+        _request_will_be_sent("c1", "https://example.com/cached.css", 12.0),
+        {"method": "Network.responseReceived", "params": {
+            "requestId": "c1", "frameId": "frame", "response": _response("https://example.com/cached.css", 12.0)}},
+        {"method": "Network.loadingFinished", "params": {"requestId": "c1", "timestamp": 12.1,
+                                                         "encodedDataLength": 0}},
+        {"method": "Network.requestServedFromCache", "params": {"requestId": "c1"}},
+        _request_will_be_sent("d1", "https://example.com/old", 13.0),
+        _request_will_be_sent("d1", "https://example.com/new", 13.1,
+                              redirectResponse=_response("https://example.com/old", 13.0, status=301)),
+        {"method": "Network.responseReceived", "params": {
+            "requestId": "d1", "frameId": "frame", "response": _response("https://example.com/new", 13.1)}},
+        {"method": "Network.loadingFinished", "params": {"requestId": "d1", "timestamp": 13.4,
+                                                         "encodedDataLength": 800}},
+        {"method": "Network.dataReceived", "params": {"requestId": "d1", "dataLength": 700}},
+        {"method": "Page.loadEventFired", "params": {"timestamp": 14.0}}
+    ]
+
+
+def test_late_events_are_applied_to_finished_entries():
+    with open(EXPECTED_HAR_PATH) as f:
+        expected = json.load(f)
+    parser = HarParser()
+    parser.add_events(make_events())
+    assert parser.build_har() == expected
+
+
+def test_late_events_are_applied_across_drains():
+    with open(EXPECTED_HAR_PATH) as f:
+        expected = json.load(f)
+    events = make_events()
+    parser = HarParser()
+    for event in events:
+        parser.add_events([event])
+    assert parser.build_har() == expected
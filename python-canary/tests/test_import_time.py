@@ -0,0 +1,47 @@
+import json
+import os
+import subprocess
+import sys
+
+LAYER_PYTHON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "lambda-layers",
+                                 "Synthetics_Selenium-32-d7dd6d0228", "python")
+# Import time of the packages the canary handler imports, boto3 alone takes longer than this on a cold Lambda
+IMPORT_TIME_BUDGET_MS = 250
+IMPORT_ATTEMPTS = 3
+# Modules that are only imported when they are used
+LAZY_MODULES = ["boto3", "botocore", "selenium", "brotli", "urllib.request"]
+
+IMPORT_SCRIPT = """
+import json
+import sys
+import time
+start = time.perf_counter()
+import aws_synthetics.selenium
+import aws_synthetics.common
+import_time_ms = (time.perf_counter() - start) * 1000
+print(json.dumps({"importTimeMs": import_time_ms, "modules": sorted(sys.modules)}))
+"""
+
+
+def _import_in_fresh_process():
+    """
+        Import the runtime package in a new interpreter, with the dependencies of the layer on the path as in Lambda
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([LAYER_PYTHON_PATH, os.path.join(LAYER_PYTHON_PATH, "lib")])
+    env.setdefault("LD_LIBRARY_PATH", "")
+    output = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT], env=env, check=True,
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def test_import_does_not_load_lazy_modules():
+    modules = set(_import_in_fresh_process()["modules"])
+    assert [module for module in LAZY_MODULES if module in modules] == []
+
+
+def test_import_time_is_within_budget():
+    # the fastest of a few imports, so a busy machine does not fail the test
+    import_time_ms = min(_import_in_fresh_process()["importTimeMs"] for _ in range(IMPORT_ATTEMPTS))
+    assert import_time_ms < IMPORT_TIME_BUDGET_MS, \
+        "Importing aws_synthetics took %.0f ms, budget is %s ms" % (import_time_ms, IMPORT_TIME_BUDGET_MS)